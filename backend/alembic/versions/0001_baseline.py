@@ -0,0 +1,70 @@
+"""baseline schema (what Base.metadata.create_all used to build)
+
+Existing databases created by create_all should be stamped at this revision:
+    alembic stamp 0001_baseline && alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "search_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("results", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_search_history_id", "search_history", ["id"])
+
+    op.create_table(
+        "image_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("prompt", sa.String(), nullable=False),
+        sa.Column("image_url", sa.Text(), nullable=True),
+        sa.Column("meta", sa.Text(), nullable=True),
+        sa.Column("results", sa.JSON(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_image_history_id", "image_history", ["id"])
+
+    op.create_table(
+        "saved_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("item_type", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("content", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_saved_items_id", "saved_items", ["id"])
+
+
+def downgrade():
+    op.drop_table("saved_items")
+    op.drop_table("image_history")
+    op.drop_table("search_history")
+    op.drop_table("users")
@@ -0,0 +1,24 @@
+"""image_history job columns (status, error)
+
+Revision ID: 0002_image_jobs
+Revises: 0001_baseline
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_image_jobs"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("image_history", sa.Column("status", sa.String(), nullable=False, server_default="done"))
+    op.add_column("image_history", sa.Column("error", sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("image_history", "error")
+    op.drop_column("image_history", "status")
@@ -0,0 +1,53 @@
+"""composite indexes for per-user history and saved item listings
+
+Matches the keyset order (ts DESC, id DESC) so listings are index range scans.
+
+Revision ID: 0003_history_indexes
+Revises: 0002_image_jobs
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_history_indexes"
+down_revision = "0002_image_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_search_history_user_ts",
+        "search_history",
+        ["user_id", sa.text('"timestamp" DESC'), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_image_history_user_ts",
+        "image_history",
+        ["user_id", sa.text('"timestamp" DESC'), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_image_history_queued",
+        "image_history",
+        ["id"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        "ix_saved_items_owner_created",
+        "saved_items",
+        ["owner_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_saved_items_created",
+        "saved_items",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_saved_items_created", table_name="saved_items")
+    op.drop_index("ix_saved_items_owner_created", table_name="saved_items")
+    op.drop_index("ix_image_history_queued", table_name="image_history")
+    op.drop_index("ix_image_history_user_ts", table_name="image_history")
+    op.drop_index("ix_search_history_user_ts", table_name="search_history")
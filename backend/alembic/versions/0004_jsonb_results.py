@@ -0,0 +1,41 @@
+"""store search/image results and image meta as JSONB
+
+search_history.results was Text holding json.dumps output, image_history.meta
+was Text, and image_history.results was JSON but written as a pre-dumped
+string (a JSON string containing JSON). Existing rows are converted in place.
+
+Revision ID: 0004_jsonb_results
+Revises: 0003_history_indexes
+Create Date: 2025-08-24
+"""
+from alembic import op
+
+
+revision = "0004_jsonb_results"
+down_revision = "0003_history_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "ALTER TABLE search_history "
+        "ALTER COLUMN results TYPE jsonb USING COALESCE(NULLIF(results, ''), '[]')::jsonb"
+    )
+    op.execute(
+        "ALTER TABLE image_history "
+        "ALTER COLUMN meta TYPE jsonb USING NULLIF(meta, '')::jsonb"
+    )
+    # unwrap the double encoding: '"[{...}]"' -> '[{...}]'
+    op.execute(
+        "ALTER TABLE image_history "
+        "ALTER COLUMN results TYPE jsonb USING CASE "
+        "WHEN json_typeof(results) = 'string' THEN (results #>> '{}')::jsonb "
+        "ELSE results::jsonb END"
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE image_history ALTER COLUMN results TYPE json USING results::json")
+    op.execute("ALTER TABLE image_history ALTER COLUMN meta TYPE text USING meta::text")
+    op.execute("ALTER TABLE search_history ALTER COLUMN results TYPE text USING results::text")
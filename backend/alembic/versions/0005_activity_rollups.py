@@ -0,0 +1,82 @@
+"""activity and term rollup tables, backfilled from existing history
+
+Revision ID: 0005_activity_rollups
+Revises: 0004_jsonb_results
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_activity_rollups"
+down_revision = "0004_jsonb_results"
+branch_labels = None
+depends_on = None
+
+
+EVENTS = """
+    SELECT user_id, 'search' AS event_type, "timestamp" AT TIME ZONE 'UTC' AS ts FROM search_history
+    UNION ALL
+    SELECT user_id, 'image', "timestamp" AT TIME ZONE 'UTC' FROM image_history WHERE status = 'done'
+    UNION ALL
+    SELECT owner_id, 'save', created_at AT TIME ZONE 'UTC' FROM saved_items
+"""
+
+BUCKETS = {
+    "hour": "date_trunc('hour', ts) AT TIME ZONE 'UTC'",
+    "day": "date_trunc('day', ts) AT TIME ZONE 'UTC'",
+    "total": "TIMESTAMPTZ '1970-01-01 00:00:00+00'",
+}
+
+# app.core.analytics.normalize_term: collapse whitespace, lowercase, 200 chars
+NORMALIZED = "left(lower(btrim(regexp_replace({col}, '\\s+', ' ', 'g'))), 200)"
+
+
+def upgrade():
+    op.create_table(
+        "activity_rollups",
+        sa.Column("granularity", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("event_type", sa.String(), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "term_rollups",
+        sa.Column("event_type", sa.String(), primary_key=True),
+        sa.Column("term", sa.String(), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_term_rollups_top", "term_rollups", ["event_type", sa.text("count DESC")])
+
+    # per-user rows plus the user_id = 0 "all users" rows in one GROUPING SETS pass
+    for granularity, bucket in BUCKETS.items():
+        op.execute(
+            f"""
+            INSERT INTO activity_rollups (granularity, user_id, bucket_start, event_type, count)
+            SELECT '{granularity}', COALESCE(user_id, 0), bucket, event_type, count(*)
+            FROM (SELECT user_id, event_type, {bucket} AS bucket FROM ({EVENTS}) e) b
+            GROUP BY GROUPING SETS ((user_id, bucket, event_type), (bucket, event_type))
+            """
+        )
+
+    op.execute(
+        f"""
+        INSERT INTO term_rollups (event_type, term, count, last_seen)
+        SELECT 'search', {NORMALIZED.format(col='query')}, count(*), max("timestamp")
+        FROM search_history GROUP BY 2
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO term_rollups (event_type, term, count, last_seen)
+        SELECT 'image', {NORMALIZED.format(col='prompt')}, count(*), max("timestamp")
+        FROM image_history WHERE status = 'done' GROUP BY 2
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("term_rollups")
+    op.drop_table("activity_rollups")
@@ -0,0 +1,24 @@
+"""image_history local asset columns
+
+Revision ID: 0006_image_assets
+Revises: 0005_activity_rollups
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_image_assets"
+down_revision = "0005_activity_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("image_history", sa.Column("asset_hash", sa.String(length=64), nullable=True))
+    op.add_column("image_history", sa.Column("asset_size", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("image_history", "asset_size")
+    op.drop_column("image_history", "asset_hash")
@@ -0,0 +1,63 @@
+"""generated tsvector columns and per-user GIN indexes for full-text search
+
+The columns are STORED generated columns, so Postgres keeps them current on every
+write. Adding them rewrites each table once; the indexes are then built
+CONCURRENTLY so reads and writes keep flowing while they build.
+
+Revision ID: 0007_fulltext
+Revises: 0006_image_assets
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+revision = "0007_fulltext"
+down_revision = "0006_image_assets"
+branch_labels = None
+depends_on = None
+
+
+# keep in sync with the search_vector columns in app/models
+VECTORS = {
+    "search_history": (
+        "user_id",
+        "setweight(to_tsvector('english', coalesce(query, '')), 'A') || "
+        "setweight(jsonb_to_tsvector('english', coalesce(results, '[]'::jsonb), '[\"string\"]'), 'C')",
+    ),
+    "image_history": ("user_id", "to_tsvector('english', coalesce(prompt, ''))"),
+    "saved_items": (
+        "owner_id",
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'B')",
+    ),
+}
+INDEXES = {
+    "search_history": "ix_search_history_fts",
+    "image_history": "ix_image_history_fts",
+    "saved_items": "ix_saved_items_fts",
+}
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    for table, (_, expression) in VECTORS.items():
+        op.add_column(table, sa.Column("search_vector", TSVECTOR(), sa.Computed(expression, persisted=True)))
+
+    with op.get_context().autocommit_block():
+        for table, (owner, _) in VECTORS.items():
+            op.create_index(
+                INDEXES[table],
+                table,
+                [owner, "search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    for table in VECTORS:
+        op.drop_index(INDEXES[table], table_name=table, if_exists=True)
+        op.drop_column(table, "search_vector")
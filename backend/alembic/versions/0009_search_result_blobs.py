@@ -0,0 +1,143 @@
+"""content-addressed search result blobs shared by search_history rows
+
+Each distinct results payload is stored once in search_results, keyed on the SHA-256
+of its jsonb text, with a reference count. search_history keeps only the hash. The
+backfill hashes every existing row, so this migration rewrites search_history once.
+
+Result text moves out of search_history.search_vector into search_results.search_vector
+(indexed once per blob instead of once per history row).
+
+Revision ID: 0009_search_result_blobs
+Revises: 0008_revoked_tokens
+Create Date: 2025-08-24
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+
+revision = "0009_search_result_blobs"
+down_revision = "0008_revoked_tokens"
+branch_labels = None
+depends_on = None
+
+
+# keep in sync with app/models/search.py
+HISTORY_VECTOR = "setweight(to_tsvector('english', coalesce(query, '')), 'A')"
+RESULT_VECTOR = "setweight(jsonb_to_tsvector('english', payload, '[\"string\"]'), 'C')"
+OLD_HISTORY_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(query, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(results, '[]'::jsonb), '[\"string\"]'), 'C')"
+)
+HASH = "encode(sha256(convert_to({col}::text, 'UTF8')), 'hex')"
+
+RELEASE_RESULT_FUNCTION = """
+CREATE OR REPLACE FUNCTION release_search_result() RETURNS trigger AS $$
+BEGIN
+    UPDATE search_results SET ref_count = ref_count - 1 WHERE hash = OLD.result_hash;
+    DELETE FROM search_results WHERE hash = OLD.result_hash AND ref_count <= 0;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+RELEASE_RESULT_TRIGGER = """
+CREATE TRIGGER search_history_release_result
+AFTER DELETE ON search_history
+FOR EACH ROW EXECUTE FUNCTION release_search_result()
+"""
+
+# lz4 TOAST compression needs Postgres 14 built with lz4; otherwise the default (pglz)
+# applies. EXECUTE defers parsing so older servers reach the handler.
+LZ4_COMPRESSION = """
+DO $$
+BEGIN
+    EXECUTE 'ALTER TABLE search_results ALTER COLUMN payload SET COMPRESSION lz4';
+EXCEPTION WHEN others THEN
+    RAISE NOTICE 'lz4 compression unavailable, search_results.payload keeps the default';
+END
+$$
+"""
+
+
+def upgrade():
+    op.create_table(
+        "search_results",
+        sa.Column("hash", sa.String(length=64), primary_key=True),
+        sa.Column("payload", JSONB(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("search_vector", TSVECTOR(), sa.Computed(RESULT_VECTOR, persisted=True)),
+    )
+    op.execute(LZ4_COMPRESSION)
+
+    # dropped first so the backfill UPDATE doesn't recompute it for every row
+    op.drop_index("ix_search_history_fts", table_name="search_history", if_exists=True)
+    op.drop_column("search_history", "search_vector")
+
+    op.add_column("search_history", sa.Column("result_hash", sa.String(length=64), nullable=True))
+    op.execute(f"UPDATE search_history SET result_hash = {HASH.format(col='results')}")
+    op.execute(
+        "INSERT INTO search_results (hash, payload, size, ref_count) "
+        "SELECT result_hash, (array_agg(results))[1], octet_length((array_agg(results))[1]::text), count(*) "
+        "FROM search_history GROUP BY result_hash"
+    )
+    op.alter_column("search_history", "result_hash", nullable=False)
+    op.create_foreign_key(
+        "search_history_result_hash_fkey", "search_history", "search_results", ["result_hash"], ["hash"]
+    )
+    op.drop_column("search_history", "results")
+    op.add_column(
+        "search_history", sa.Column("search_vector", TSVECTOR(), sa.Computed(HISTORY_VECTOR, persisted=True))
+    )
+
+    op.execute(RELEASE_RESULT_FUNCTION)
+    op.execute(RELEASE_RESULT_TRIGGER)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_search_history_result",
+            "search_history",
+            ["result_hash", "user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_search_history_fts",
+            "search_history",
+            ["user_id", "search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_search_results_fts",
+            "search_results",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS search_history_release_result ON search_history")
+    op.execute("DROP FUNCTION IF EXISTS release_search_result()")
+
+    op.add_column("search_history", sa.Column("results", JSONB(), nullable=True))
+    op.execute(
+        "UPDATE search_history h SET results = r.payload FROM search_results r WHERE r.hash = h.result_hash"
+    )
+    op.alter_column("search_history", "results", nullable=False)
+
+    op.drop_index("ix_search_history_fts", table_name="search_history", if_exists=True)
+    op.drop_index("ix_search_history_result", table_name="search_history", if_exists=True)
+    op.drop_column("search_history", "search_vector")
+    op.drop_constraint("search_history_result_hash_fkey", "search_history", type_="foreignkey")
+    op.drop_column("search_history", "result_hash")
+    op.drop_table("search_results")
+
+    op.add_column(
+        "search_history", sa.Column("search_vector", TSVECTOR(), sa.Computed(OLD_HISTORY_VECTOR, persisted=True))
+    )
+    op.create_index("ix_search_history_fts", "search_history", ["user_id", "search_vector"], postgresql_using="gin")
@@ -0,0 +1,135 @@
+"""partition search_history and image_history by month on "timestamp"
+
+Each table is rebuilt as a RANGE-partitioned parent with one partition per month (from
+the oldest row up to PARTITION_PREMAKE_MONTHS ahead) plus a DEFAULT partition. Later
+months are created by the compaction task in app/core/retention.py, which also drops
+partitions past their table's retention. Rows are copied once; "timestamp" becomes NOT
+NULL (missing values get the migration time) and part of the primary key.
+
+Needs Postgres 13+ (row triggers, foreign keys and GIN indexes on partitioned tables).
+
+Revision ID: 0010_history_partitions
+Revises: 0009_search_result_blobs
+Create Date: 2025-08-24
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_history_partitions"
+down_revision = "0009_search_result_blobs"
+branch_labels = None
+depends_on = None
+
+
+PREMAKE_MONTHS = 3  # default of PARTITION_PREMAKE_MONTHS
+
+FOREIGN_KEYS = {
+    "search_history": [
+        "ADD CONSTRAINT search_history_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)",
+        "ADD CONSTRAINT search_history_result_hash_fkey FOREIGN KEY (result_hash) REFERENCES search_results (hash)",
+    ],
+    "image_history": [
+        "ADD CONSTRAINT image_history_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)",
+    ],
+}
+
+# on a partitioned parent these cascade to every current and future partition
+INDEXES = {
+    "search_history": [
+        "CREATE INDEX ix_search_history_id ON search_history (id)",
+        'CREATE INDEX ix_search_history_user_ts ON search_history (user_id, "timestamp" DESC, id DESC)',
+        "CREATE INDEX ix_search_history_fts ON search_history USING gin (user_id, search_vector)",
+        "CREATE INDEX ix_search_history_result ON search_history (result_hash, user_id)",
+    ],
+    "image_history": [
+        "CREATE INDEX ix_image_history_id ON image_history (id)",
+        'CREATE INDEX ix_image_history_user_ts ON image_history (user_id, "timestamp" DESC, id DESC)',
+        "CREATE INDEX ix_image_history_queued ON image_history (id) WHERE status = 'queued'",
+        "CREATE INDEX ix_image_history_fts ON image_history USING gin (user_id, search_vector)",
+    ],
+}
+
+# keep in sync with app/models/search.py (the function itself is kept from 0009)
+RELEASE_RESULT_TRIGGER = """
+CREATE TRIGGER search_history_release_result
+AFTER DELETE ON search_history
+FOR EACH ROW EXECUTE FUNCTION release_search_result()
+"""
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def copied_columns(table):
+    """Columns of `table` in order, without the generated search_vector."""
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position"
+        ),
+        {"table": table},
+    )
+    return [name for (name,) in rows]
+
+
+def rebuild(table, old, partitioned):
+    """Move `table` to `old`, recreate it (partitioned or plain) and copy the rows over."""
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER INDEX IF EXISTS {table}_pkey RENAME TO {old}_pkey")
+    for statement in INDEXES[table]:
+        name = statement.split()[2]
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+
+    suffix = ' PARTITION BY RANGE ("timestamp")' if partitioned else ""
+    op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED){suffix}")
+    null = "SET NOT NULL" if partitioned else "DROP NOT NULL"
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN "timestamp" {null}')
+
+    if partitioned:
+        oldest = op.get_bind().execute(sa.text(f'SELECT min("timestamp") FROM {old}')).scalar()
+        now = datetime.now(timezone.utc)
+        month = (oldest or now).astimezone(timezone.utc)
+        month = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        last = add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), PREMAKE_MONTHS)
+        while month <= last:
+            upper = add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            month = upper
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    columns = copied_columns(old)
+    names = ", ".join(f'"{c}"' for c in columns)
+    values = ", ".join('coalesce("timestamp", now())' if c == "timestamp" else f'"{c}"' for c in columns)
+    op.execute(f"INSERT INTO {table} ({names}) SELECT {values} FROM {old}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {old}")
+
+    key = 'id, "timestamp"' if partitioned else "id"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({key})")
+    for constraint in FOREIGN_KEYS[table]:
+        op.execute(f"ALTER TABLE {table} {constraint}")
+    for statement in INDEXES[table]:
+        op.execute(statement)
+    if table == "search_history":
+        op.execute(RELEASE_RESULT_TRIGGER)
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade():
+    for table in INDEXES:
+        rebuild(table, f"{table}_unpartitioned", partitioned=True)
+
+
+def downgrade():
+    for table in INDEXES:
+        # dropping the partitioned parent below drops its partitions with it
+        rebuild(table, f"{table}_partitioned", partitioned=False)
@@ -0,0 +1,24 @@
+"""index revoked_tokens.revoked_at, the revocation mirror's sync cursor
+
+The mirror used to sync on `id > last seen id`, which skips rows whose insert committed
+after a higher id had been read. It now re-reads a window of recent `revoked_at` values.
+
+Revision ID: 0011_revoked_at_index
+Revises: 0010_history_partitions
+Create Date: 2025-08-24
+"""
+from alembic import op
+
+
+revision = "0011_revoked_at_index"
+down_revision = "0010_history_partitions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+
+def downgrade():
+    op.drop_index("ix_revoked_tokens_revoked_at", table_name="revoked_tokens")
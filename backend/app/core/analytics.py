@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import ActivityRollup, TermRollup
+
+ALL_USERS = 0
+TOTAL_BUCKET = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TERM_MAX_LENGTH = 200
+
+
+def normalize_term(term: str) -> str:
+    # keep in sync with the backfill in alembic 0005_activity_rollups
+    return " ".join(term.split()).lower()[:TERM_MAX_LENGTH]
+
+
+def buckets(when: datetime) -> list[tuple[str, datetime]]:
+    when = when.astimezone(timezone.utc)
+    return [
+        ("hour", when.replace(minute=0, second=0, microsecond=0)),
+        ("day", when.replace(hour=0, minute=0, second=0, microsecond=0)),
+        ("total", TOTAL_BUCKET),
+    ]
+
+
+async def record_activity(
+    db: AsyncSession,
+    user_id: int,
+    event_types: tuple[str, ...],
+    term: tuple[str, str] | None = None,
+    when: datetime | None = None,
+):
+    """Bump the rollup counters inside the caller's transaction (one upsert per table)."""
+    await record_activities(db, [(user_id, event_types, term, when)])
+
+
+async def record_activities(
+    db: AsyncSession,
+    events: list[tuple[int, tuple[str, ...], tuple[str, str] | None, datetime | None]],
+):
+    """Batched record_activity: counts are summed per key first, since one
+    ON CONFLICT statement may not touch the same row twice."""
+    counts: dict[tuple, int] = {}
+    terms: dict[tuple[str, str], list] = {}
+    now = datetime.now(timezone.utc)
+    for user_id, event_types, term, when in events:
+        when = when or now
+        for e in event_types:
+            for g, b in buckets(when):
+                for u in (user_id, ALL_USERS):
+                    key = (g, u, b, e)
+                    counts[key] = counts.get(key, 0) + 1
+        if term:
+            key = (term[0], normalize_term(term[1]))
+            entry = terms.setdefault(key, [0, when])
+            entry[0] += 1
+            entry[1] = max(entry[1], when)
+
+    if counts:
+        # fixed lock order so concurrent upserts on the shared ALL_USERS rows can't deadlock
+        rows = [
+            {"granularity": g, "user_id": u, "bucket_start": b, "event_type": e, "count": n}
+            for (g, u, b, e), n in sorted(counts.items())
+        ]
+        stmt = insert(ActivityRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "user_id", "bucket_start", "event_type"],
+            set_={"count": ActivityRollup.count + stmt.excluded["count"]},
+        )
+        await db.execute(stmt)
+
+    if terms:
+        rows = [
+            {"event_type": e, "term": t, "count": n, "last_seen": last_seen}
+            for (e, t), (n, last_seen) in sorted(terms.items())
+        ]
+        stmt = insert(TermRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["event_type", "term"],
+            set_={
+                "count": TermRollup.count + stmt.excluded["count"],
+                "last_seen": func.greatest(TermRollup.last_seen, stmt.excluded.last_seen),
+            },
+        )
+        await db.execute(stmt)
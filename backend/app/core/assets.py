@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.config import get_settings
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+CHUNK_SIZE = 64 * 1024
+# content-addressed files never change, so caches may keep them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class AssetTooLargeError(Exception):
+    pass
+
+
+def sniff_content_type(head: bytes) -> str:
+    for magic, content_type in _SIGNATURES:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def make_thumbnail(src: str, dst: str, size: int):
+    # runs in a worker process: decoding and resizing are CPU-bound
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        img.save(tmp, "WEBP", quality=80)
+    os.replace(tmp, dst)
+
+
+class AssetStore:
+    """Files on local disk named by the SHA-256 of their content."""
+
+    def __init__(self, root: str, max_bytes: int, thumbnail_size: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+
+    def path(self, digest: str, thumbnail: bool = False) -> str:
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f"invalid asset digest {digest!r}")
+        name = f"{digest}.thumb.webp" if thumbnail else digest
+        return os.path.join(self.root, digest[:2], name)
+
+    def content_type(self, digest: str) -> str:
+        with open(self.path(digest), "rb") as f:
+            return sniff_content_type(f.read(16))
+
+    async def write(self, chunks: AsyncIterator[bytes]) -> tuple[str, int]:
+        """Store a byte stream; returns (digest, size). Duplicates are stored once."""
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise AssetTooLargeError(f"asset larger than {self.max_bytes} bytes")
+                    sha.update(chunk)
+                    f.write(chunk)
+            digest = sha.hexdigest()
+            dst = self.path(digest)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if os.path.exists(dst):
+                os.unlink(tmp)
+            else:
+                os.replace(tmp, dst)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return digest, size
+
+    async def download(self, url: str, timeout: float) -> tuple[str, int]:
+        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+            async with client.stream("GET", url) as resp:
+                resp.raise_for_status()
+                return await self.write(resp.aiter_bytes(CHUNK_SIZE))
+
+    async def thumbnail(self, digest: str) -> str:
+        """Path of the thumbnail, rendering it in the process pool if it doesn't exist yet."""
+        dst = self.path(digest, thumbnail=True)
+        if not os.path.exists(dst):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                get_thumbnail_executor(), make_thumbnail, self.path(digest), dst, self.thumbnail_size
+            )
+        return dst
+
+
+_thumbnail_executor: ProcessPoolExecutor | None = None
+
+
+def get_thumbnail_executor() -> ProcessPoolExecutor:
+    global _thumbnail_executor
+    if _thumbnail_executor is None:
+        _thumbnail_executor = ProcessPoolExecutor(max_workers=get_settings().IMAGE_THUMBNAIL_WORKERS)
+    return _thumbnail_executor
+
+
+def shutdown_thumbnail_executor():
+    global _thumbnail_executor
+    if _thumbnail_executor is not None:
+        _thumbnail_executor.shutdown(wait=False, cancel_futures=True)
+        _thumbnail_executor = None
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """First range of a `bytes=` header as inclusive (start, end); None to serve the whole file.
+
+    Raises HTTPException(416) when the range lies outside the file.
+    """
+    units, _, spec = header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None  # multipart ranges are optional; answer with the full body
+    start_s, _, end_s = spec.strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        else:
+            start, end = max(size - int(end_s), 0), size - 1  # suffix range: last N bytes
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _file_chunks(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def asset_response(request: Request, path: str, etag: str, media_type: str) -> Response:
+    """Serve an immutable file with ETag / If-None-Match and single-range support."""
+    etag = f'"{etag}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_file_chunks(path, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _file_chunks(path, start, end - start + 1), status_code=206, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+from app.core.metrics import background_task
+
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobRunner:
+    """Bounded queue drained by a fixed number of async workers.
+
+    `handler(job_id)` does the actual work and reports progress through
+    `publish`; callers follow a job with `subscribe`/`wait`.
+    """
+
+    def __init__(self, handler: Callable[[Hashable], Awaitable[None]], workers: int, queue_size: int):
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self._loop = None
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        # outlives loop rebinds: callers may subscribe before the first submit starts us
+        self._listeners: dict[Hashable, set[asyncio.Queue]] = {}
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [background_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, job_id: Hashable):
+        self.start()
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Job queue is full, try again later")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.handler(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # handlers are expected to record their own failures
+                print(f" Job {job_id} crashed: {e!r}")
+                self.publish(job_id, {"status": "failed", "error": str(e)})
+            finally:
+                self._queue.task_done()
+
+    def publish(self, job_id: Hashable, event: dict):
+        for q in list(self._listeners.get(job_id, ())):
+            q.put_nowait(event)
+
+    def subscribe(self, job_id: Hashable) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, job_id: Hashable, q: asyncio.Queue):
+        listeners = self._listeners.get(job_id)
+        if listeners is not None:
+            listeners.discard(q)
+            if not listeners:
+                del self._listeners[job_id]
+
+    async def wait(self, job_id: Hashable, q: asyncio.Queue, timeout: float) -> dict:
+        """Block until a terminal event arrives on a queue from `subscribe`."""
+        async def next_terminal():
+            while True:
+                event = await q.get()
+                if event.get("status") in TERMINAL_STATUSES:
+                    return event
+
+        try:
+            return await asyncio.wait_for(next_terminal(), timeout)
+        finally:
+            self.unsubscribe(job_id, q)
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Callable
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSES = Counter("http_responses_total", "HTTP responses by route and status", ["method", "route", "status"])
+
+MCP_PHASE = Histogram(
+    "mcp_phase_duration_seconds",
+    "Time spent in each MCP phase (connect, initialize, list_tools, call_tool)",
+    ["server", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+MCP_ERRORS = Counter("mcp_phase_errors_total", "Failed MCP phases", ["server", "phase"])
+
+DB_STATEMENT = Histogram(
+    "db_statement_duration_seconds", "Per-statement database time", ["verb"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request", "Statements executed per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Database time per HTTP request", ["route"], buckets=LATENCY_BUCKETS
+)
+
+# per-request database accounting, filled in by the engine hooks
+_request_db: ContextVar[dict | None] = ContextVar("request_db", default=None)
+
+
+def background_task(coro) -> asyncio.Task:
+    """create_task for work that outlives the request that happened to start it.
+
+    Tasks inherit the caller's context, so without this a flusher or worker started
+    lazily inside a request would keep charging its queries to that request.
+    """
+    context = copy_context()
+    context.run(_request_db.set, None)
+    return asyncio.get_running_loop().create_task(coro, context=context)
+
+
+@contextmanager
+def mcp_phase(server: str, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        MCP_ERRORS.labels(server, phase).inc()
+        raise
+    finally:
+        MCP_PHASE.labels(server, phase).observe(time.perf_counter() - start)
+
+
+def instrument_engine(sync_engine):
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_STATEMENT.labels(verb).observe(elapsed)
+        acc = _request_db.get()
+        if acc is not None:
+            acc["count"] += 1
+            acc["seconds"] += elapsed
+
+
+def route_template(request: Request) -> str:
+    # label by the matched path template, not the raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+async def metrics_middleware(request: Request, call_next):
+    acc = {"count": 0, "seconds": 0.0}
+    token = _request_db.set(acc)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _request_db.reset(token)
+        route = route_template(request)
+        HTTP_LATENCY.labels(request.method, route).observe(elapsed)
+        HTTP_RESPONSES.labels(request.method, route, str(status)).inc()
+        DB_STATEMENTS_PER_REQUEST.labels(route).observe(acc["count"])
+        DB_TIME_PER_REQUEST.labels(route).observe(acc["seconds"])
+
+
+class StatsCollector:
+    """Exposes existing `stats()` dicts (caches, pool, queues) as gauges at scrape time."""
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], dict]] = {}
+
+    def register(self, prefix: str, source: Callable[[], dict]):
+        self._sources[prefix] = source
+
+    def collect(self):
+        for prefix, source in self._sources.items():
+            try:
+                stats = source()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield GaugeMetricFamily(f"{prefix}_{key}", f"{prefix} {key}", value=value)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def register_stats(prefix: str, source: Callable[[], dict]):
+    stats_collector.register(prefix, source)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
+
+from app.core.config import get_settings
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_ranked_cursor(rank: float, ts: datetime, kind: str, row_id: int) -> str:
+    raw = json.dumps([rank, ts.isoformat(), kind, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_ranked_cursor(cursor: str) -> tuple[float, datetime, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rank, ts, kind, row_id = json.loads(raw)
+        return float(rank), datetime.fromisoformat(ts), str(kind), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class PageParams:
+    """Query params shared by every keyset-paginated listing (newest first)."""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+        limit: int | None = Query(None, ge=1, description="Page size"),
+        since: datetime | None = Query(None, description="Only rows at or after this time"),
+        until: datetime | None = Query(None, description="Only rows before this time"),
+    ):
+        settings = get_settings()
+        self.cursor = cursor
+        self.limit = min(limit or settings.PAGE_SIZE_DEFAULT, settings.PAGE_SIZE_MAX)
+        self.since = since
+        self.until = until
+
+
+def paginate(stmt, ts_col, id_col, page: PageParams):
+    """Apply date filters, the cursor seek and ordering on (ts_col, id_col) DESC.
+
+    Fetches one extra row so `split_page` can tell whether another page exists.
+    """
+    if page.since is not None:
+        stmt = stmt.where(ts_col >= page.since)
+    if page.until is not None:
+        stmt = stmt.where(ts_col < page.until)
+    if page.cursor:
+        ts, row_id = decode_cursor(page.cursor)
+        stmt = stmt.where(tuple_(ts_col, id_col) < tuple_(ts, row_id))
+    return stmt.order_by(ts_col.desc(), id_col.desc()).limit(page.limit + 1)
+
+
+def split_page(rows, page: PageParams, ts_attr: str):
+    rows = list(rows)
+    if len(rows) <= page.limit:
+        return rows, None
+    rows = rows[: page.limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_attr), last.id)
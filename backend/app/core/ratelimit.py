@@ -0,0 +1,177 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, HTTPException, status
+
+from app.core.config import get_settings
+from app.core.security import get_current_user
+
+
+class MemoryBucketBackend:
+    """Token buckets in this process. Per-worker limits; use Redis to share them."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> tuple[bool, float]:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+
+        if tokens >= cost:
+            allowed, retry_after = True, 0.0
+            tokens -= cost
+        else:
+            allowed, retry_after = False, (cost - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)  # idle buckets are full anyway
+        return allowed, retry_after
+
+
+# Same algorithm as MemoryBucketBackend, evaluated atomically inside Redis.
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker. Needs `pip install redis`."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> tuple[bool, float]:
+        allowed, retry_after = await self._take(keys=[f"ratelimit:{key}"], args=[rate, burst, cost])
+        return bool(allowed), float(retry_after)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+        else:
+            _backend = MemoryBucketBackend()
+    return _backend
+
+
+def budgets() -> dict[str, tuple[float, float]]:
+    # name -> (tokens per second, burst)
+    settings = get_settings()
+    return {
+        "search": (settings.SEARCH_RATE_PER_MINUTE / 60, settings.SEARCH_BURST),
+        "image": (settings.IMAGE_RATE_PER_MINUTE / 60, settings.IMAGE_BURST),
+    }
+
+
+async def take_token(budget: str, user_id) -> tuple[bool, float]:
+    rate, burst = budgets()[budget]
+    return await get_backend().take(f"{budget}:{user_id}", rate, burst)
+
+
+def rate_limited(budget: str):
+    """Dependency: the current user, after taking a token from their `budget` bucket."""
+
+    async def dependency(current_user=Depends(get_current_user)):
+        allowed, retry_after = await take_token(budget, current_user["sub"])
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded for {budget}",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        return current_user
+
+    return dependency
+
+
+class OverloadedError(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Caps concurrent work and the number of callers allowed to queue for a slot."""
+
+    def __init__(self, limit: int, max_waiting: int, wait_timeout: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._loop = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sem = asyncio.Semaphore(self.limit)
+        return self._sem
+
+    @asynccontextmanager
+    async def slot(self):
+        sem = self._semaphore()
+        if not sem.locked():
+            await sem.acquire()  # a free slot is taken without suspending
+        elif self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise OverloadedError("Too many upstream calls queued", self.wait_timeout)
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(sem.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise OverloadedError("Timed out waiting for an upstream slot", self.wait_timeout)
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            sem.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
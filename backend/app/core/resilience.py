@@ -0,0 +1,90 @@
+import random
+import time
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for '{name}' is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open (one probe) -> closed."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probing = False
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_failure: str | None = None
+
+    @property
+    def state(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def check(self):
+        """Fail fast while open, without taking the half-open probe."""
+        if self.state == "open":
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after)
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError. Returns True if the call is the half-open probe."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probing):
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after or self.reset_timeout)
+        if state == "half_open":
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state == "open":
+            return  # late outcome of a call started before the breaker opened
+        self.failures = 0
+        self._state = "closed"
+
+    def record_failure(self, error: Exception):
+        if self.state == "open":
+            return
+        self.failures += 1
+        self.last_failure = repr(error)
+        if self._state == "closed" and self.failures < self.failure_threshold:
+            return
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def release(self, probe: bool):
+        # end of a call admitted by before_call, whatever its outcome
+        if probe:
+            self._probing = False
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "open": int(state == "open"),
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after, 3) if state == "open" else 0,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # "full jitter": uniform in [0, min(cap, base * 2**attempt)]
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
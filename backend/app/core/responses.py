@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+
+from fastapi.responses import Response
+from sqlalchemy import Text, cast, func, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+
+class RawJSON(str):
+    """Already-encoded JSON text, spliced into a response as-is."""
+
+
+def render_json(obj) -> str:
+    if isinstance(obj, RawJSON):
+        return obj
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{json.dumps(str(k))}:{render_json(v)}" for k, v in obj.items()) + "}"
+    if isinstance(obj, (list, tuple)):
+        return "[" + ",".join(render_json(v) for v in obj) + "]"
+    if isinstance(obj, datetime):
+        return json.dumps(obj.isoformat())
+    return json.dumps(obj)
+
+
+class RawJSONResponse(Response):
+    """JSON response that can embed RawJSON fragments without decoding them."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return render_json(content).encode("utf-8")
+
+
+def jsonb_head(col, n: int):
+    """First `n` elements of a JSONB array column, computed in the database."""
+    # render_derived names the columns: AS elems(value, ord)
+    elems = func.jsonb_array_elements(col).table_valued("value", with_ordinality="ord").render_derived(name="elems")
+    return (
+        select(func.coalesce(func.jsonb_agg(aggregate_order_by(elems.c.value, elems.c.ord)), text("'[]'::jsonb")))
+        .where(elems.c.ord <= n)
+        .scalar_subquery()
+    )
+
+
+def json_row(**fields):
+    """json_build_object(...)::text so each row arrives already encoded."""
+    args = []
+    for key, value in fields.items():
+        args.extend([text(f"'{key}'"), value])
+    return cast(func.json_build_object(*args), Text)
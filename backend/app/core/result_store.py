@@ -0,0 +1,33 @@
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Hashes are computed by Postgres over the jsonb text so new writes, the backfill in
+# alembic 0009 and any payload from another client all agree on the key. Inserts are
+# ordered by hash so concurrent batches lock shared blobs in the same order.
+STORE_RESULTS = text("""
+WITH incoming AS (
+    SELECT ord, value AS payload, encode(sha256(convert_to(value::text, 'UTF8')), 'hex') AS hash
+    FROM jsonb_array_elements(CAST(:payloads AS jsonb)) WITH ORDINALITY AS t(value, ord)
+), stored AS (
+    INSERT INTO search_results (hash, payload, size, ref_count)
+    SELECT hash, (array_agg(payload))[1], octet_length((array_agg(payload))[1]::text), count(*)
+    FROM incoming
+    GROUP BY hash
+    ORDER BY hash
+    ON CONFLICT (hash) DO UPDATE SET ref_count = search_results.ref_count + EXCLUDED.ref_count
+)
+SELECT hash FROM incoming ORDER BY ord
+""").bindparams(bindparam("payloads", type_=JSONB))
+
+
+async def store_results(db: AsyncSession, payloads: list[list]) -> list[str]:
+    """Store each payload once, taking one reference per entry; returns the hashes in order.
+
+    References are released by the delete trigger on search_history, so the caller must
+    insert one history row per returned hash in the same transaction.
+    """
+    if not payloads:
+        return []
+    result = await db.execute(STORE_RESULTS, {"payloads": payloads})
+    return list(result.scalars())
@@ -0,0 +1,344 @@
+import asyncio
+import gzip
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import background_task, register_stats
+from app.db.session import async_session_maker
+
+# partitioned history tables -> setting with their retention in days
+RETAINED_TABLES = {
+    "search_history": "SEARCH_HISTORY_RETENTION_DAYS",
+    "image_history": "IMAGE_HISTORY_RETENTION_DAYS",
+}
+
+# monthly partitions are named <table>_pYYYYMM; the name is the source of truth for the range
+PARTITION_RE = re.compile(r"^(?P<table>[a-z_]+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+# one JSON document per archived row; search results are joined back in from their blob
+ARCHIVE_ROWS = {
+    "search_history": (
+        "SELECT (to_jsonb(t) - 'search_vector' || jsonb_build_object('results', r.payload))::text "
+        "FROM {source} t JOIN search_results r ON r.hash = t.result_hash"
+    ),
+    "image_history": "SELECT (to_jsonb(t) - 'search_vector')::text FROM {source} t",
+}
+
+# pg_try_advisory_xact_lock key: one compaction at a time across workers
+COMPACTION_LOCK = 0x68697374  # "hist"
+
+# SQLSTATE lock_not_available, raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def month_start(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_lock_timeout(e: DBAPIError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == LOCK_NOT_AVAILABLE
+
+
+async def set_ddl_lock_timeout(db: AsyncSession):
+    # attaching or dropping a partition takes an ACCESS EXCLUSIVE lock on the parent; waiting
+    # for it behind a long reader would queue every other history query behind us
+    timeout = int(get_settings().PARTITION_DDL_LOCK_TIMEOUT_MS)
+    await db.execute(text(f"SET LOCAL lock_timeout = {timeout}"))
+
+
+def partition_month(name: str) -> datetime | None:
+    match = PARTITION_RE.match(name)
+    if not match:
+        return None  # the default partition
+    return datetime(int(match["year"]), int(match["month"]), 1, tzinfo=timezone.utc)
+
+
+async def list_partitions(db: AsyncSession, table: str) -> list[dict]:
+    rows = await db.execute(
+        text(
+            "SELECT c.relname, pg_total_relation_size(c.oid), greatest(c.reltuples, 0)::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+        ),
+        {"table": table},
+    )
+    return [
+        {"name": name, "month": partition_month(name), "bytes": size, "rows_estimate": estimate}
+        for name, size, estimate in rows
+    ]
+
+
+async def ensure_partition(db: AsyncSession, table: str, month: datetime) -> bool:
+    """Create the partition for `month` unless it exists. False if it can't be created yet.
+
+    Gives up (rolling back to a savepoint) when the parent table stays locked for longer
+    than PARTITION_DDL_LOCK_TIMEOUT_MS; the next run tries again.
+    """
+    name = partition_name(table, month)
+    if await db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}):
+        return True
+    upper = add_months(month, 1)
+    # rows of this month already sitting in the default partition would make CREATE fail
+    stray = await db.scalar(
+        text(f'SELECT EXISTS (SELECT 1 FROM {table}_default WHERE "timestamp" >= :lower AND "timestamp" < :upper)'),
+        {"lower": month, "upper": upper},
+    )
+    if stray:
+        print(f" Retention: {name} not created, {table}_default already has rows for that month")
+        return False
+    try:
+        async with db.begin_nested():
+            await set_ddl_lock_timeout(db)
+            await db.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+            )
+    except DBAPIError as e:
+        if not is_lock_timeout(e):
+            raise
+        print(f" Retention: {name} not created, {table} is busy; retrying next run")
+        return False
+    return True
+
+
+async def drop_partition(db: AsyncSession, table: str, name: str):
+    await set_ddl_lock_timeout(db)
+    if table == "search_history":
+        # DROP doesn't fire the per-row delete trigger, so release the blob references here
+        await db.execute(
+            text(
+                "CREATE TEMP TABLE released ON COMMIT DROP AS "
+                f"SELECT result_hash AS hash, count(*) AS n FROM {name} GROUP BY result_hash"
+            )
+        )
+        await db.execute(
+            text("UPDATE search_results r SET ref_count = r.ref_count - released.n FROM released WHERE r.hash = released.hash")
+        )
+    await db.execute(text(f"DROP TABLE {name}"))
+    if table == "search_history":
+        await db.execute(
+            text("DELETE FROM search_results r USING released WHERE r.hash = released.hash AND r.ref_count <= 0")
+        )
+
+
+async def table_sizes(db: AsyncSession) -> dict:
+    """On-disk size (with indexes and TOAST) and estimated rows of every table; partitions summed up."""
+    rows = await db.execute(
+        text(
+            "SELECT c.relname, c.relkind::text, pg_total_relation_size(c.oid), greatest(c.reltuples, 0)::bigint "
+            "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND NOT c.relispartition "
+            "ORDER BY c.relname"
+        )
+    )
+    settings = get_settings()
+    tables = {}
+    for name, kind, size, estimate in rows.all():
+        entry = {"bytes": size, "rows_estimate": estimate}
+        if kind == "p":
+            partitions = await list_partitions(db, name)
+            entry["bytes"] = sum(p["bytes"] for p in partitions)
+            entry["rows_estimate"] = sum(p["rows_estimate"] for p in partitions)
+            entry["partitions"] = [
+                {"name": p["name"], "bytes": p["bytes"], "rows_estimate": p["rows_estimate"]} for p in partitions
+            ]
+        if name in RETAINED_TABLES:
+            entry["retention_days"] = getattr(settings, RETAINED_TABLES[name]) or None
+        tables[name] = entry
+    return tables
+
+
+class Compactor:
+    """Background retention for the partitioned history tables.
+
+    Each run creates the coming months' partitions, then (for tables with a retention)
+    archives every partition that ended before the cutoff to gzipped NDJSON and drops it.
+    Old rows that ended up in the default partition are archived and deleted row by row.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.session_maker = async_session_maker
+        self.running = False
+        self.last_run: datetime | None = None
+        self.next_run: datetime | None = None
+        self.last_result: dict | None = None
+        self.last_error: str | None = None
+        self.runs = 0
+        self.dropped_partitions = 0
+        self.archived_rows = 0
+        self._loop = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task and not self._task.done():
+            return
+        self._loop = loop
+        self.next_run = datetime.now(timezone.utc)  # premake partitions right away
+        self._task = background_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            delay = (self.next_run - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                print(f" Retention compaction failed: {e!r}")
+            self.next_run = datetime.now(timezone.utc) + timedelta(seconds=self.interval)
+
+    async def run_once(self) -> dict:
+        settings = get_settings()
+        now = datetime.now(timezone.utc)
+        self.running = True
+        try:
+            async with self.session_maker() as lock:
+                # held until this session's transaction ends
+                if not await lock.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": COMPACTION_LOCK}):
+                    return {"skipped": "another worker is compacting"}
+                result = {}
+                for table, setting in RETAINED_TABLES.items():
+                    result[table] = await self.compact(table, getattr(settings, setting), now)
+        finally:
+            self.running = False
+        self.runs += 1
+        self.last_run = now
+        self.last_result = result
+        self.last_error = None
+        return result
+
+    async def compact(self, table: str, retention_days: int, now: datetime) -> dict:
+        settings = get_settings()
+        summary = {"created": [], "dropped": [], "archived_rows": 0, "deleted_rows": 0}
+
+        async with self.session_maker() as db:
+            existing = {p["name"] for p in await list_partitions(db, table)}
+            this_month = month_start(now)
+            for n in range(settings.PARTITION_PREMAKE_MONTHS + 1):
+                month = add_months(this_month, n)
+                if partition_name(table, month) not in existing and await ensure_partition(db, table, month):
+                    summary["created"].append(partition_name(table, month))
+            await db.commit()
+
+        if retention_days <= 0:
+            return summary
+        cutoff = now - timedelta(days=retention_days)
+
+        async with self.session_maker() as db:
+            partitions = await list_partitions(db, table)
+        # a partition goes once its whole month is past the cutoff
+        expired = [p["name"] for p in partitions if p["month"] and add_months(p["month"], 1) <= cutoff]
+        for name in expired:
+            if settings.RETENTION_ARCHIVE:
+                summary["archived_rows"] += await self.archive(table, name)
+            async with self.session_maker() as db:
+                try:
+                    await drop_partition(db, table, name)
+                    await db.commit()
+                except DBAPIError as e:
+                    if not is_lock_timeout(e):
+                        raise
+                    print(f" Retention: {name} not dropped, {table} is busy; retrying next run")
+                    continue
+            summary["dropped"].append(name)
+            self.dropped_partitions += 1
+
+        default = f"{table}_default"
+        if settings.RETENTION_ARCHIVE:
+            summary["archived_rows"] += await self.archive(table, default, cutoff)
+        async with self.session_maker() as db:
+            # row deletes fire the result-blob release trigger, unlike DROP
+            deleted = await db.execute(text(f'DELETE FROM {default} WHERE "timestamp" < :cutoff'), {"cutoff": cutoff})
+            await db.commit()
+        summary["deleted_rows"] = deleted.rowcount
+
+        self.archived_rows += summary["archived_rows"]
+        return summary
+
+    async def archive(self, table: str, source: str, cutoff: datetime | None = None) -> int:
+        """Write the rows of `source` (older than `cutoff`, if given) to <dir>/<table>/<source>.ndjson.gz."""
+        settings = get_settings()
+        directory = os.path.join(settings.RETENTION_ARCHIVE_DIR, table)
+        os.makedirs(directory, exist_ok=True)
+        suffix = f"-{cutoff:%Y%m%dT%H%M%S}" if cutoff is not None else ""
+        path = os.path.join(directory, f"{source}{suffix}.ndjson.gz")
+        tmp = f"{path}.part"
+
+        sql = ARCHIVE_ROWS[table].format(source=source)
+        params = {}
+        if cutoff is not None:
+            sql += ' WHERE t."timestamp" < :cutoff'
+            params["cutoff"] = cutoff
+        stmt = text(sql + " ORDER BY t.id").execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+
+        count = 0
+        out = await asyncio.to_thread(gzip.open, tmp, "wt", encoding="utf-8")
+        try:
+            async with self.session_maker() as db:
+                result = await db.stream(stmt, params)
+                async for batch in result.partitions():
+                    await asyncio.to_thread(out.write, "".join(row[0] + "\n" for row in batch))
+                    count += len(batch)
+        except BaseException:
+            await asyncio.to_thread(out.close)
+            os.unlink(tmp)
+            raise
+        await asyncio.to_thread(out.close)
+
+        if count:
+            os.replace(tmp, path)
+            print(f" Retention: archived {count} rows of {source} to {path}")
+        else:
+            os.unlink(tmp)
+        return count
+
+    def status(self) -> dict:
+        return {
+            "enabled": get_settings().COMPACTION_ENABLED,
+            "interval_seconds": self.interval,
+            "running": self.running,
+            "last_run": self.last_run,
+            "next_run": self.next_run,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "running": int(self.running),
+            "dropped_partitions": self.dropped_partitions,
+            "archived_rows": self.archived_rows,
+        }
+
+
+compactor = Compactor(get_settings().COMPACTION_INTERVAL_SECONDS)
+register_stats("retention", compactor.stats)
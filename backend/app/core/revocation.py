@@ -0,0 +1,117 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.core.metrics import background_task, register_stats
+from app.db.session import async_session_maker
+from app.models.revoked_token import RevokedToken
+
+
+class RevocationList:
+    """Revoked JWT ids mirrored in memory so per-request checks never hit the database.
+
+    The mirror is synced incrementally at most every `refresh_interval` seconds, in the
+    background; other workers therefore see a logout within that interval. Ids whose token
+    has expired anyway are dropped.
+
+    Each sync reads the rows revoked since the previous one started, minus `overlap`
+    seconds. Ids can't serve as the cursor: concurrent inserts commit out of id order, so a
+    row with a lower id may become visible after a higher one has been read.
+    """
+
+    def __init__(self, refresh_interval: float, prune_interval: float = 3600.0, overlap: float = 60.0):
+        self.refresh_interval = refresh_interval
+        self.prune_interval = prune_interval
+        self.overlap = overlap
+        self.session_maker = async_session_maker
+        self._revoked: dict[str, float] = {}  # jti -> exp (unix time)
+        self._synced_at: datetime | None = None  # database clock at the start of the last sync
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._pruned_at = time.monotonic()
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti is not None and jti in self._revoked
+
+    async def sync(self):
+        """Refresh the mirror when it is stale: waits on first use, afterwards runs in the background."""
+        if not self._loaded:
+            await self.refresh()
+            return
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._task = background_task(self._background_refresh())
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f" Revocation list refresh failed: {e!r}")
+
+    async def refresh(self):
+        async with self.session_maker() as db:
+            # revoked_at is the inserting transaction's start time, so a row can turn up
+            # after the sync that covered its timestamp; the overlap catches those commits
+            started = await db.scalar(select(func.now()))
+            query = select(RevokedToken.jti, RevokedToken.expires_at)
+            if self._synced_at is not None:
+                query = query.where(RevokedToken.revoked_at >= self._synced_at - timedelta(seconds=self.overlap))
+            for jti, expires_at in await db.execute(query):
+                self._revoked[jti] = expires_at.timestamp()
+
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.now(timezone.utc)))
+                await db.commit()
+                self._pruned_at = time.monotonic()
+
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp < now]:
+            del self._revoked[jti]
+        self._synced_at = started
+        self._loaded = True
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    async def revoke(self, claims: dict) -> bool:
+        """Revoke a verified token. False if it was already revoked (e.g. a reused refresh token)."""
+        jti = claims.get("jti")
+        if jti is None:
+            return False  # issued before tokens carried ids; can't be revoked
+        async with self.session_maker() as db:
+            result = await db.execute(
+                insert(RevokedToken)
+                .values(
+                    jti=jti,
+                    user_id=int(claims["sub"]),
+                    token_type=claims.get("type", "access"),
+                    expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc),
+                )
+                .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+                .returning(RevokedToken.id)
+            )
+            inserted = result.scalar_one_or_none() is not None
+            await db.commit()
+        self._revoked[jti] = float(claims["exp"])
+        return inserted
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "refreshes": self.refreshes,
+            "age_seconds": time.monotonic() - self._refreshed_at if self._loaded else -1,
+        }
+
+
+revocations = RevocationList(
+    get_settings().TOKEN_REVOCATION_REFRESH_SECONDS, overlap=get_settings().TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS
+)
+register_stats("token_revocations", revocations.stats)
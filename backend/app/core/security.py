@@ -1,3 +1,10 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import jwt
 from passlib.context import CryptContext
@@ -5,9 +12,17 @@ from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 
 from app.core.config import get_settings
+from app.core.metrics import register_stats
+from app.core.revocation import revocations
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=get_settings().BCRYPT_ROUNDS,
+    # anything below the configured cost counts as outdated and is rehashed on login
+    bcrypt__min_rounds=get_settings().BCRYPT_ROUNDS,
+)
 
 # OAuth2 scheme for FastAPI dependencies
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -21,6 +36,59 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
+def verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    # new hash is returned when the stored one uses outdated parameters (e.g. fewer rounds)
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# bcrypt takes tens of milliseconds per call, so it runs off the event loop
+_hash_executor: Executor | None = None
+_hash_limit: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        settings = get_settings()
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="pwd-hash",
+            )
+    return _hash_executor
+
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+def _get_hash_limit() -> asyncio.Semaphore:
+    global _hash_limit
+    loop = asyncio.get_running_loop()
+    if _hash_limit is None or _hash_limit[0] is not loop:
+        _hash_limit = (loop, asyncio.Semaphore(get_settings().PASSWORD_HASH_CONCURRENCY))
+    return _hash_limit[1]
+
+
+async def _run_hashing(fn, *args):
+    async with _get_hash_limit():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hash_executor(), fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_hashing(verify_and_update, password, hashed)
+
+
 def create_token(sub: str, role: str, expires_delta: timedelta, token_type: str) -> str:
     settings = get_settings()
     now = datetime.now(timezone.utc)
@@ -28,6 +96,7 @@ def create_token(sub: str, role: str, expires_delta: timedelta, token_type: str)
         "sub": sub,   # user_id
         "role": role,
         "type": token_type,
+        "jti": uuid.uuid4().hex,  # lets this token be revoked on its own
         "iat": int(now.timestamp()),
         "exp": int((now + expires_delta).timestamp()),
     }
@@ -59,27 +128,116 @@ def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
 
 
+class TokenCache:
+    """LRU of verified token claims keyed on the token's SHA-256.
+
+    Entries expire after `ttl` seconds or at the token's `exp`, whichever is first.
+    Locked, because sync dependencies run in the threadpool.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        key = self._key(token)
+        with self._lock:
+            self._data[key] = (claims, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+
+token_cache = TokenCache(get_settings().JWT_CACHE_SIZE, get_settings().JWT_CACHE_TTL_SECONDS)
+register_stats("jwt_cache", token_cache.stats)
+
+
+def verify_token(token: str) -> dict:
+    """decode_token, skipping the signature check for tokens verified recently. Don't mutate the result."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.put(token, claims)
+    return claims
+
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        payload = decode_token(token)
-        user_id = payload.get("sub")
-        role = payload.get("role")
-
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        return {"sub": user_id, "role": role}
+        payload = verify_token(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_id = payload.get("sub")
+    role = payload.get("role")
+
+    # outside the try above: an unreachable database must not read as a bad token (the
+    # frontend logs users out on 401). Stale refreshes run in the background and keep
+    # the last mirror; only a worker's first load can fail here.
+    try:
+        await revocations.sync()  # in-memory unless the mirror is stale
+    except Exception as e:
+        print(f" Revocation list unavailable: {e!r}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Authentication temporarily unavailable")
+    if not user_id or revocations.is_revoked(payload.get("jti")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return {"sub": user_id, "role": role}
 
 
 
@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from app.core.metrics import background_task
+
+
+class WriteBehindQueue:
+    """Buffers records and persists them in batches off the request path.
+
+    `flush(records)` writes one batch and returns one result per record (e.g. the
+    new row ids). A batch is flushed once `batch_size` records are pending or
+    `interval` seconds have passed. `submit` returns a future for callers that
+    need the result.
+    """
+
+    instances: list["WriteBehindQueue"] = []
+
+    def __init__(self, name: str, flush: Callable[[list], Awaitable[list]], batch_size: int, interval: float):
+        self.name = name
+        self.flush = flush
+        self.batch_size = batch_size
+        self.interval = interval
+        self._loop = None
+        self._task: asyncio.Task | None = None
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._inflight: list[Any] = []
+        self._closing = False
+        self.flushed = 0
+        self.failed = 0
+        WriteBehindQueue.instances.append(self)
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task and not self._task.done():
+            return
+        self._loop = loop
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = background_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, record) -> asyncio.Future:
+        self.start()
+        fut = self._loop.create_future()
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending.append((record, fut))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return fut
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f" Write-behind [{self.name}] flush loop error: {e!r}")
+
+    async def _write(self, batch: list[tuple[Any, asyncio.Future]]):
+        records = [r for r, _ in batch]
+        self._inflight = records
+        try:
+            results = await self.flush(records)
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                print(f" Write-behind [{self.name}] dropped record: {e!r}")
+                batch[0][1].set_exception(e)
+                return
+            # retry one by one so a single bad record can't sink the whole batch
+            for item in batch:
+                await self._write([item])
+            return
+        finally:
+            self._inflight = []
+
+        self.flushed += len(batch)
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def drain(self):
+        """Flush everything pending now (also waits for a flush already running)."""
+        if self._task is None:
+            return
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                try:
+                    await self._write(batch)
+                except asyncio.CancelledError:
+                    # put unanswered records back so close() can still write them
+                    self._pending[:0] = [item for item in batch if not item[1].done()]
+                    raise
+
+    async def barrier(self, predicate: Callable[[Any], bool] | None = None):
+        """Read-your-writes: make sure matching records are in the database."""
+        records = [r for r, _ in self._pending] + list(self._inflight)
+        if any(predicate is None or predicate(r) for r in records):
+            await self.drain()
+
+    async def close(self):
+        if self._task is None:
+            return
+        # let the flusher finish the batch it is writing instead of cancelling it mid-write
+        self._closing = True
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self.drain()
+        self._task = None
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed, "failed": self.failed}
+
+
+async def flush_all(predicate: Callable[[Any], bool] | None = None):
+    for queue in WriteBehindQueue.instances:
+        await queue.barrier(predicate)
+
+
+async def close_all():
+    for queue in WriteBehindQueue.instances:
+        await queue.close()
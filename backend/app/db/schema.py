@@ -0,0 +1,56 @@
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(BACKEND_ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_ROOT / "alembic"))
+    return cfg
+
+
+def head_revision() -> str:
+    # read from the migration scripts on disk, not from the database
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(engine: AsyncEngine) -> str | None:
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            return None  # never migrated
+        return result.scalar_one_or_none()
+
+
+async def ensure_schema(engine: AsyncEngine):
+    """One-row version check at startup instead of create_all's table introspection."""
+    expected = head_revision()
+    current = await current_revision(engine)
+    if current == expected:
+        return
+
+    if get_settings().DB_AUTO_MIGRATE:
+        print(f" Migrating database schema {current} -> {expected}")
+        # alembic's env.py runs its own event loop, so keep it off ours
+        await asyncio.to_thread(command.upgrade, alembic_config(), "head")
+        return
+
+    raise SchemaOutOfDateError(
+        f"Database schema is at {current}, expected {expected}. "
+        "Run `alembic upgrade head` from the backend directory."
+    )
@@ -2,10 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import select
 from app.db.session import engine, get_session
-from app.models.base import Base
+from app.db.schema import ensure_schema
 from app.models.user import User
-from app.routers import auth, search, image, dashboard   
+from app.routers import auth, search, image, dashboard, export, fulltext
+from app.routers.mcp_client import mcp_pool
 from app.core import security
+from app.core.assets import shutdown_thumbnail_executor
+from app.core.config import get_settings
+from app.core.retention import compactor
+from app.core.metrics import metrics_middleware, metrics_endpoint
+from app.core.write_behind import close_all as close_all_writers
 
 app = FastAPI(title="AI Explorer API")
 
@@ -15,6 +21,9 @@ origins = [
     "http://127.0.0.1:5173",   
 ]
 
+app.middleware("http")(metrics_middleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -26,8 +35,20 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await ensure_schema(engine)
+
+@app.on_event("startup")
+async def start_mcp_pool():
+    await mcp_pool.start()
+
+@app.on_event("startup")
+async def start_image_jobs():
+    await image.start_image_jobs()
+
+@app.on_event("startup")
+async def start_compaction():
+    if get_settings().COMPACTION_ENABLED:
+        compactor.start()
 
 @app.on_event("startup")
 async def create_default_admin():
@@ -36,7 +57,7 @@ async def create_default_admin():
         admin = result.scalar_one_or_none()
 
         if not admin:
-            hashed = security.hash_password("admin123")
+            hashed = await security.hash_password_async("admin123")
             admin = User(
                 email="admin@example.com",
                 hashed_password=hashed,
@@ -49,10 +70,19 @@ async def create_default_admin():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await image.image_jobs.close()
+    await compactor.close()
+    # persist everything still buffered before the engine goes away
+    await close_all_writers()
+    await mcp_pool.close()
     await engine.dispose()
+    security.shutdown_hash_executor()
+    shutdown_thumbnail_executor()
 
 app.include_router(auth.router)              
 app.include_router(search.search_router)     
 app.include_router(image.image_router)       
 app.include_router(dashboard.dashboard_router)
+app.include_router(export.export_router)
+app.include_router(fulltext.fulltext_router)
 
@@ -1,13 +1,19 @@
 from app.models.base import Base
 from app.models.user import User
 from app.models.saved_item import SavedItem
-from app.models.search import SearchHistory
+from app.models.search import SearchHistory, SearchResult
 from app.models.image import ImageHistory
+from app.models.analytics import ActivityRollup, TermRollup
+from app.models.revoked_token import RevokedToken
 
 __all__ = [
     "Base",
     "User",
     "SavedItem",
     "SearchHistory",
+    "SearchResult",
     "ImageHistory",
+    "ActivityRollup",
+    "TermRollup",
+    "RevokedToken",
 ]
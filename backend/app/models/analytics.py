@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class ActivityRollup(Base):
+    """Event counters per (granularity, user, bucket, type), bumped as events are written."""
+
+    __tablename__ = "activity_rollups"
+
+    granularity = Column(String, primary_key=True)  # hour | day | total
+    user_id = Column(Integer, primary_key=True)  # 0 = all users
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    event_type = Column(String, primary_key=True)  # search | image | save
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class TermRollup(Base):
+    """How often each normalized query / prompt was used."""
+
+    __tablename__ = "term_rollups"
+
+    event_type = Column(String, primary_key=True)  # search | image
+    term = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    last_seen = Column(DateTime(timezone=True), server_default=func.now())
+
+
+Index("ix_term_rollups_top", TermRollup.event_type, TermRollup.count.desc())
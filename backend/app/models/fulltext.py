@@ -0,0 +1,18 @@
+from sqlalchemy import DDL, Column, Computed, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from app.models.base import Base
+
+# text search configuration used for every search_vector column and query
+TS_CONFIG = "english"
+
+# per-user GIN indexes are (user_id, search_vector); btree_gin supplies the integer opclass
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+
+
+def tsvector_column(expression: str):
+    """Generated tsvector column, kept up to date by Postgres on every insert/update.
+
+    Deferred so ordinary ORM loads don't fetch it.
+    """
+    return deferred(Column(TSVECTOR, Computed(expression, persisted=True)))
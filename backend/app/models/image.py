@@ -1,19 +1,45 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import DDL, BigInteger, Column, Integer, String, DateTime, ForeignKey, Text, Index, event, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
+from app.models.fulltext import tsvector_column
+from app.models.partitions import DEFAULT_PARTITION
 
 class ImageHistory(Base):
     __tablename__ = "image_history"
+    # monthly partitions, see app/core/retention.py; the key must be part of the primary key
+    __table_args__ = {"postgresql_partition_by": 'RANGE ("timestamp")'}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     prompt = Column(String, nullable=False)
     image_url = Column(Text, nullable=True)
-    meta = Column(Text, nullable=True)
-    results = Column(JSON, nullable=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    meta = Column(JSONB, nullable=True)
+    results = Column(JSONB, nullable=True)
+    status = Column(String, nullable=False, server_default="done")  # queued | running | done | failed
+    error = Column(Text, nullable=True)
+    # local copy of the generated image (sha256 of its bytes, see app/core/assets.py)
+    asset_hash = Column(String(64), nullable=True)
+    asset_size = Column(BigInteger, nullable=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+    __mapper_args__ = {"primary_key": [id]}  # ids are still unique; keep get() by id working
+    search_vector = tsvector_column("to_tsvector('english', coalesce(prompt, ''))")
 
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="image_history")
 
+
+# per-user history listing, newest first (see alembic 0003_history_indexes)
+Index("ix_image_history_user_ts", ImageHistory.user_id, ImageHistory.timestamp.desc(), ImageHistory.id.desc())
+# queued jobs picked up at startup
+Index("ix_image_history_queued", ImageHistory.id, postgresql_where=text("status = 'queued'"))
+# full-text search within one user's prompts (see alembic 0007_fulltext)
+Index(
+    "ix_image_history_fts",
+    ImageHistory.__table__.c.user_id,
+    ImageHistory.__table__.c.search_vector,
+    postgresql_using="gin",
+)
+
+event.listen(ImageHistory.__table__, "after_create", DDL(DEFAULT_PARTITION))
@@ -0,0 +1,3 @@
+# Rows whose month has no partition yet land here instead of failing the insert.
+# %(table)s is filled in by DDL with the table the event fired for.
+DEFAULT_PARTITION = "CREATE TABLE IF NOT EXISTS %(table)s_default PARTITION OF %(table)s DEFAULT"
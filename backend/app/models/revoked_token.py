@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class RevokedToken(Base):
+    """JWT ids that may no longer be used. Rows are append-only; `revoked_at` is the sync cursor."""
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    user_id = Column(Integer, index=True, nullable=False)
+    token_type = Column(String, nullable=False)  # access | refresh
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True, nullable=False)
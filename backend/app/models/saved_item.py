@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
+from app.models.fulltext import tsvector_column
 
 
 class SavedItem(Base):
@@ -13,6 +14,11 @@ class SavedItem(Base):
     content = Column(String, nullable=True)
     name = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now()) 
+    # title (weight A) and content (weight B)
+    search_vector = tsvector_column(
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+    )
 
     # Relationship back to User
     user = relationship("User", back_populates="saved_items")
@@ -28,3 +34,15 @@ class SavedItem(Base):
             "name": self.name,
             "created_at": str(self.created_at),
         }
+
+
+# dashboard listings, per owner and system-wide (see alembic 0003_history_indexes)
+Index("ix_saved_items_owner_created", SavedItem.owner_id, SavedItem.created_at.desc(), SavedItem.id.desc())
+Index("ix_saved_items_created", SavedItem.created_at.desc(), SavedItem.id.desc())
+# full-text search within one owner's items (see alembic 0007_fulltext)
+Index(
+    "ix_saved_items_fts",
+    SavedItem.__table__.c.owner_id,
+    SavedItem.__table__.c.search_vector,
+    postgresql_using="gin",
+)
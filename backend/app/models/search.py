@@ -1,18 +1,80 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
+from app.models.fulltext import tsvector_column
+from app.models.partitions import DEFAULT_PARTITION
+
+
+class SearchResult(Base):
+    """One MCP search output, stored once and shared by every history row with the same payload.
+
+    Keyed on the SHA-256 of the payload's jsonb text, which Postgres normalizes (key order,
+    whitespace). ref_count is raised by app.core.result_store and lowered by a delete trigger
+    on search_history; a blob is removed when nothing references it any more.
+    """
+
+    __tablename__ = "search_results"
+
+    hash = Column(String(64), primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    size = Column(Integer, nullable=False)  # bytes of the jsonb text, before TOAST compression
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # every string in the result snippets (weight C), matched by /search/fulltext
+    search_vector = tsvector_column(
+        "setweight(jsonb_to_tsvector('english', payload, '[\"string\"]'), 'C')"
+    )
+
 
 class SearchHistory(Base):
     __tablename__ = "search_history"
+    # monthly partitions, see app/core/retention.py; the key must be part of the primary key
+    __table_args__ = {"postgresql_partition_by": 'RANGE ("timestamp")'}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     query = Column(String, nullable=False)
-    results = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    result_hash = Column(String(64), ForeignKey("search_results.hash"), nullable=False)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+    __mapper_args__ = {"primary_key": [id]}  # ids are still unique; keep get() by id working
+    # query only (weight A); result text is indexed once per blob in search_results
+    search_vector = tsvector_column("setweight(to_tsvector('english', coalesce(query, '')), 'A')")
 
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="search_history")
 
 
+# per-user history listing, newest first (see alembic 0003_history_indexes)
+Index("ix_search_history_user_ts", SearchHistory.user_id, SearchHistory.timestamp.desc(), SearchHistory.id.desc())
+# full-text search within one user's history (see alembic 0007_fulltext)
+Index(
+    "ix_search_history_fts",
+    SearchHistory.__table__.c.user_id,
+    SearchHistory.__table__.c.search_vector,
+    postgresql_using="gin",
+)
+# blob -> history rows: FK checks on blob delete, and full-text hits in result text
+Index("ix_search_history_result", SearchHistory.result_hash, SearchHistory.user_id)
+Index("ix_search_results_fts", SearchResult.__table__.c.search_vector, postgresql_using="gin")
+
+
+# keep in sync with alembic 0009_search_result_blobs
+RELEASE_RESULT_FUNCTION = """
+CREATE OR REPLACE FUNCTION release_search_result() RETURNS trigger AS $$
+BEGIN
+    UPDATE search_results SET ref_count = ref_count - 1 WHERE hash = OLD.result_hash;
+    DELETE FROM search_results WHERE hash = OLD.result_hash AND ref_count <= 0;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+RELEASE_RESULT_TRIGGER = """
+CREATE TRIGGER search_history_release_result
+AFTER DELETE ON search_history
+FOR EACH ROW EXECUTE FUNCTION release_search_result()
+"""
+event.listen(SearchHistory.__table__, "after_create", DDL(RELEASE_RESULT_FUNCTION))
+event.listen(SearchHistory.__table__, "after_create", DDL(RELEASE_RESULT_TRIGGER))
+event.listen(SearchHistory.__table__, "after_create", DDL(DEFAULT_PARTITION))
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, Form, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import get_session
-from app.schemas.auth import UserCreate, Token
+from app.schemas.auth import UserCreate, Token, LogoutRequest
 from app.models.user import User
 from app.core import security
+from app.core.revocation import revocations
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -17,7 +18,7 @@ async def register(user_in: UserCreate, db: AsyncSession = Depends(get_session))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed = security.hash_password(user_in.password)
+    hashed = await security.hash_password_async(user_in.password)
     user = User(email=user_in.email, hashed_password=hashed, role="user")
     db.add(user)
     await db.commit()
@@ -51,9 +52,18 @@ async def login(
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
 
-    if not user or not security.verify_password(passwd, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await security.verify_and_update_password(passwd, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # transparently upgrade hashes made with old bcrypt parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     access = security.create_access_token(str(user.id), user.role)
     refresh = security.create_refresh_token(str(user.id), user.role)
 
@@ -69,10 +79,36 @@ async def refresh(token: str):
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+    if "jti" not in payload:
+        raise HTTPException(status_code=401, detail="Refresh token predates rotation, please log in again")
+
+    # rotation: each refresh token works once. The insert is the check, so two
+    # concurrent refreshes with the same token can't both succeed.
+    if not await revocations.revoke(payload):
+        raise HTTPException(status_code=401, detail="Refresh token already used or revoked")
+
     user_id, role = payload.get("sub"), payload.get("role", "user")
     access = security.create_access_token(user_id, role)
     refresh = security.create_refresh_token(user_id, role)
     return Token(access_token=access, refresh_token=refresh)
 
 
+@router.post("/logout", status_code=204)
+async def logout(
+    body: LogoutRequest | None = None,
+    token: str = Depends(security.oauth2_scheme),
+    current_user=Depends(security.get_current_user),
+):
+    await revocations.revoke(security.verify_token(token))
+
+    if body and body.refresh_token:
+        try:
+            payload = security.decode_token(body.refresh_token)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid refresh token")
+        if payload.get("type") != "refresh" or payload.get("sub") != current_user["sub"]:
+            raise HTTPException(status_code=400, detail="Invalid refresh token")
+        await revocations.revoke(payload)
+
+
 __all__ = ["router"]
@@ -1,35 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.db.session import get_session
+from app.db.session import get_session, pool_status
 from app.models.saved_item import SavedItem
-from app.core.security import require_admin
+from app.core.security import require_admin, token_cache
+from app.core.pagination import PageParams, paginate, split_page
+from app.core.analytics import ALL_USERS
+from app.core.retention import compactor, table_sizes
+from app.core.write_behind import flush_all
+from app.models.analytics import ActivityRollup, TermRollup
+from app.routers.mcp_client import mcp_pool
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 dashboard_router = router   # alias bana liya
 
 
+def saved_items_page(stmt, page: PageParams, item_type: str | None):
+    if item_type:
+        stmt = stmt.where(SavedItem.item_type == item_type)
+    return paginate(stmt, SavedItem.created_at, SavedItem.id, page)
+
+
 @router.get("/admin/{user_id}")
 async def admin_list_user_items(
     user_id: int,
+    page: PageParams = Depends(),
+    item_type: str | None = Query(None, description="Filter by item type (search, image)"),
     session: AsyncSession = Depends(get_session),
     admin=Depends(require_admin)
 ):
-    result = await session.execute(select(SavedItem).where(SavedItem.owner_id == user_id))
-    items = result.scalars().all()
-    return [i.to_dict() for i in items]  # <-- make sure SavedItem has .to_dict() or use Pydantic schema
+    await flush_all(lambda r: r["user_id"] == user_id)
+    stmt = select(SavedItem).where(SavedItem.owner_id == user_id)
+    result = await session.execute(saved_items_page(stmt, page, item_type))
+    items, next_cursor = split_page(result.scalars().all(), page, "created_at")
+    return {"items": [i.to_dict() for i in items], "next_cursor": next_cursor}
 
 
 # ✅ Admin: list all items of all users
 @router.get("/admin/users/all")
 async def admin_list_all_items(
+    page: PageParams = Depends(),
+    item_type: str | None = Query(None, description="Filter by item type (search, image)"),
     session: AsyncSession = Depends(get_session),
     admin=Depends(require_admin)
 ):
-    result = await session.execute(select(SavedItem))
-    items = result.scalars().all()
-    return [i.to_dict() for i in items]
+    await flush_all()
+    result = await session.execute(saved_items_page(select(SavedItem), page, item_type))
+    items, next_cursor = split_page(result.scalars().all(), page, "created_at")
+    return {"items": [i.to_dict() for i in items], "next_cursor": next_cursor}
 
 
 # ✅ Admin: update a specific item
@@ -55,4 +75,121 @@ async def admin_update_item(
     return item.to_dict()
 
 
+# ✅ Admin: activity analytics (served from the rollup tables)
+@router.get("/admin/analytics/summary")
+async def admin_analytics_summary(
+    limit: int = Query(100, ge=1, le=1000, description="Max users in per_user"),
+    session: AsyncSession = Depends(get_session),
+    admin=Depends(require_admin)
+):
+    totals = (
+        select(ActivityRollup.user_id, ActivityRollup.event_type, ActivityRollup.count)
+        .where(ActivityRollup.granularity == "total")
+    )
+    result = await session.execute(totals.where(ActivityRollup.user_id == ALL_USERS))
+    per_type = {event_type: count for _, event_type, count in result.all()}
+
+    users = (
+        select(ActivityRollup.user_id)
+        .where(ActivityRollup.granularity == "total", ActivityRollup.user_id != ALL_USERS)
+        .distinct()
+        .order_by(ActivityRollup.user_id)
+        .limit(limit)
+    )
+    result = await session.execute(
+        totals.where(ActivityRollup.user_id.in_(users)).order_by(ActivityRollup.user_id)
+    )
+    per_user: dict[int, dict[str, int]] = {}
+    for user_id, event_type, count in result.all():
+        per_user.setdefault(user_id, {})[event_type] = count
+
+    return {
+        "per_type": per_type,
+        "per_user": [{"user_id": uid, **counts} for uid, counts in per_user.items()],
+    }
+
+
+@router.get("/admin/analytics/timeseries")
+async def admin_analytics_timeseries(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    since: datetime | None = Query(None, description="Defaults to 48 hours / 30 days ago"),
+    until: datetime | None = Query(None),
+    user_id: int = Query(ALL_USERS, description="0 = all users"),
+    event_type: str | None = Query(None, description="search, image or save"),
+    session: AsyncSession = Depends(get_session),
+    admin=Depends(require_admin)
+):
+    if since is None:
+        window = timedelta(hours=48) if granularity == "hour" else timedelta(days=30)
+        since = datetime.now(timezone.utc) - window
+
+    stmt = (
+        select(ActivityRollup.bucket_start, ActivityRollup.event_type, ActivityRollup.count)
+        .where(
+            ActivityRollup.granularity == granularity,
+            ActivityRollup.user_id == user_id,
+            ActivityRollup.bucket_start >= since,
+        )
+        .order_by(ActivityRollup.bucket_start)
+    )
+    if until is not None:
+        stmt = stmt.where(ActivityRollup.bucket_start < until)
+    if event_type:
+        stmt = stmt.where(ActivityRollup.event_type == event_type)
+
+    series: dict[datetime, dict[str, int]] = {}
+    for bucket_start, etype, count in (await session.execute(stmt)).all():
+        series.setdefault(bucket_start, {})[etype] = count
+
+    return {
+        "granularity": granularity,
+        "user_id": user_id,
+        "series": [{"bucket": bucket, **counts} for bucket, counts in series.items()],
+    }
+
+
+@router.get("/admin/analytics/top")
+async def admin_analytics_top(
+    event_type: str = Query("search", pattern="^(search|image)$"),
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_session),
+    admin=Depends(require_admin)
+):
+    result = await session.execute(
+        select(TermRollup.term, TermRollup.count, TermRollup.last_seen)
+        .where(TermRollup.event_type == event_type)
+        .order_by(TermRollup.count.desc())
+        .limit(limit)
+    )
+    return {
+        "event_type": event_type,
+        "top": [{"term": term, "count": count, "last_seen": last_seen} for term, count, last_seen in result.all()],
+    }
+
+
+# ✅ Admin: live connection pool metrics
+@router.get("/admin/db/pool")
+async def admin_db_pool(admin=Depends(require_admin)):
+    return pool_status()
+
+
+# ✅ Admin: table sizes, history partitions and the retention compaction schedule
+@router.get("/admin/db/tables")
+async def admin_db_tables(session: AsyncSession = Depends(get_session), admin=Depends(require_admin)):
+    return {"tables": await table_sizes(session), "compaction": compactor.status()}
+
+
+# ✅ Admin: MCP upstream health (circuit breakers, sessions, admission)
+@router.get("/admin/mcp/upstreams")
+async def admin_mcp_upstreams(admin=Depends(require_admin)):
+    return {
+        "upstreams": mcp_pool.status(),
+        "admission": mcp_pool.admission.stats(),
+        "calls": mcp_pool.stats(),
+    }
+
 
+# ✅ Admin: verified-JWT cache hit / eviction counters
+@router.get("/admin/auth/token-cache")
+async def admin_token_cache(admin=Depends(require_admin)):
+    return token_cache.stats()
@@ -0,0 +1,111 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Text, cast, select
+from app.db.session import open_session
+from app.models.saved_item import SavedItem
+from app.models.search import SearchHistory, SearchResult
+from app.models.image import ImageHistory
+from app.core.config import get_settings
+from app.core.responses import json_row
+from app.core.security import require_admin
+
+router = APIRouter(prefix="/dashboard/admin/export", tags=["Dashboard"])
+
+export_router = router
+
+
+# table name -> (model, owner column, time column)
+EXPORT_TABLES = {
+    "saved_items": (SavedItem, SavedItem.owner_id, SavedItem.created_at),
+    "search_history": (SearchHistory, SearchHistory.user_id, SearchHistory.timestamp),
+    "image_history": (ImageHistory, ImageHistory.user_id, ImageHistory.timestamp),
+}
+# table name -> (joined table, on clause, extra columns); search results live in their own table
+EXPORT_JOINS = {
+    "search_history": (
+        SearchResult,
+        SearchResult.hash == SearchHistory.result_hash,
+        {"results": SearchResult.payload},
+    ),
+}
+
+
+def export_query(table: str, fmt: str, user_id: int | None, since: datetime | None, until: datetime | None):
+    model, owner_col, ts_col = EXPORT_TABLES[table]
+    # generated columns (search_vector) are derived data, not worth exporting
+    columns = {c.name: c for c in model.__table__.columns if c.computed is None}
+    join = EXPORT_JOINS.get(table)
+    if join is not None:
+        columns.update(join[2])
+
+    if fmt == "ndjson":
+        # one JSON document per row, encoded by Postgres
+        stmt = select(json_row(**columns))
+    else:
+        stmt = select(*[cast(c, Text).label(name) for name, c in columns.items()])
+    if join is not None:
+        stmt = stmt.select_from(model).join(join[0], join[1])
+
+    if user_id is not None:
+        stmt = stmt.where(owner_col == user_id)
+    if since is not None:
+        stmt = stmt.where(ts_col >= since)
+    if until is not None:
+        stmt = stmt.where(ts_col < until)
+    return stmt.order_by(model.id), list(columns)
+
+
+def encode_batch(rows, fmt: str) -> str:
+    if fmt == "ndjson":
+        return "".join(row[0] + "\n" for row in rows)
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+@router.get("/{table}")
+async def admin_export(
+    table: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    user_id: int | None = Query(None, description="Only rows owned by this user"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    admin=Depends(require_admin),
+):
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table. Available: {list(EXPORT_TABLES)}")
+
+    stmt, header = export_query(table, format, user_id, since, until)
+    batch_size = get_settings().EXPORT_BATCH_SIZE
+
+    async def rows():
+        # server-side cursor: only one batch is in memory at a time
+        async with open_session(request) as session:
+            result = await session.stream(stmt.execution_options(yield_per=batch_size))
+            async for batch in result.partitions():
+                yield encode_batch(batch, format)
+
+    async def body():
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 -> gzip container
+        if format == "csv":
+            first = encode_batch([header], format)
+            yield compressor.compress(first.encode()) if compressor else first.encode()
+        async for chunk in rows():
+            data = chunk.encode()
+            yield compressor.compress(data) if compressor else data
+        if compressor:
+            yield compressor.flush()
+
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,146 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, literal, or_, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.models.fulltext import TS_CONFIG
+from app.models.image import ImageHistory
+from app.models.saved_item import SavedItem
+from app.models.search import SearchHistory, SearchResult
+from app.core.pagination import PageParams, decode_ranked_cursor, encode_ranked_cursor
+from app.core.security import get_current_user
+from app.core.write_behind import flush_all
+
+router = APIRouter(prefix="/search", tags=["Full-text Search"])
+
+fulltext_router = router
+
+SOURCES = ("search", "image", "saved")
+
+# ts_headline output is plain text with <mark> around matches; it is NOT HTML-escaped
+TITLE_HEADLINE = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+SNIPPET_HEADLINE = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=8"
+
+
+def matches(kind: str, id_col, ts_col, owner_col, vector_col, user_id: int, query, page: PageParams):
+    # filtered on (owner, search_vector) so the per-user GIN index does the work
+    stmt = (
+        select(
+            literal(kind).label("kind"),
+            id_col.label("id"),
+            ts_col.label("ts"),
+            func.ts_rank(vector_col, query).label("rank"),
+        )
+        .where(owner_col == user_id, vector_col.op("@@")(query))
+    )
+    return in_range(stmt, ts_col, page)
+
+
+def search_matches(user_id: int, query, page: PageParams):
+    """Search history hits: in the query (per-user index) or in the shared result blob."""
+    # result text is indexed once per blob; matching blobs are mapped back through
+    # the (result_hash, user_id) index
+    in_results = select(SearchResult.hash).where(SearchResult.search_vector.op("@@")(query)).correlate(None)
+    vector = SearchHistory.search_vector.op("||")(SearchResult.search_vector)
+    stmt = (
+        select(
+            literal("search").label("kind"),
+            SearchHistory.id.label("id"),
+            SearchHistory.timestamp.label("ts"),
+            func.ts_rank(vector, query).label("rank"),
+        )
+        .join(SearchResult, SearchResult.hash == SearchHistory.result_hash)
+        .where(
+            SearchHistory.user_id == user_id,
+            or_(SearchHistory.search_vector.op("@@")(query), SearchHistory.result_hash.in_(in_results)),
+        )
+    )
+    return in_range(stmt, SearchHistory.timestamp, page)
+
+
+def in_range(stmt, ts_col, page: PageParams):
+    if page.since is not None:
+        stmt = stmt.where(ts_col >= page.since)
+    if page.until is not None:
+        stmt = stmt.where(ts_col < page.until)
+    return stmt
+
+
+def result_text(results):
+    """All result snippet texts of a search, joined, for the highlighter."""
+    elem = func.jsonb_array_elements(results).table_valued("value").alias("elem")
+    return select(func.string_agg(elem.c.value.op("->>")("text"), " ")).scalar_subquery()
+
+
+async def headlines(db: AsyncSession, kind: str, ids: list[int], query) -> dict[int, tuple[str, str | None]]:
+    """(title, snippet) with highlighted matches, computed only for the rows on this page."""
+    join = None
+    if kind == "search":
+        title, body, id_col = SearchHistory.query, result_text(SearchResult.payload), SearchHistory.id
+        join = (SearchResult, SearchResult.hash == SearchHistory.result_hash)
+    elif kind == "image":
+        title, body, id_col = ImageHistory.prompt, None, ImageHistory.id
+    else:
+        title, body, id_col = SavedItem.title, SavedItem.content, SavedItem.id
+
+    columns = [id_col, func.ts_headline(TS_CONFIG, title, query, TITLE_HEADLINE)]
+    if body is not None:
+        columns.append(func.ts_headline(TS_CONFIG, func.coalesce(body, ""), query, SNIPPET_HEADLINE))
+    stmt = select(*columns).where(id_col.in_(ids))
+    if join is not None:
+        stmt = stmt.join(*join)
+    rows = await db.execute(stmt)
+    return {row[0]: (row[1], row[2] if body is not None else None) for row in rows}
+
+
+@router.get("/fulltext")
+async def fulltext_search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words, \"quoted phrases\", OR, -excluded"),
+    types: list[str] = Query(list(SOURCES), description="Any of: search, image, saved"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    user_id = int(current_user["sub"])
+    # search history and saved items are written behind; make this user's rows visible
+    await flush_all(lambda r: r["user_id"] == user_id)
+
+    query = func.websearch_to_tsquery(TS_CONFIG, q)
+    sources = {
+        "image": (ImageHistory.id, ImageHistory.timestamp, ImageHistory.user_id, ImageHistory.search_vector),
+        "saved": (SavedItem.id, SavedItem.created_at, SavedItem.owner_id, SavedItem.search_vector),
+    }
+    selected = [kind for kind in SOURCES if kind in types]
+    if not selected:
+        return {"query": q, "results": [], "next_cursor": None}
+
+    hits = union_all(*[
+        search_matches(user_id, query, page) if kind == "search" else matches(kind, *sources[kind], user_id, query, page)
+        for kind in selected
+    ]).subquery("hits")
+    order = (hits.c.rank, hits.c.ts, hits.c.kind, hits.c.id)
+    stmt = select(hits)
+    if page.cursor:
+        stmt = stmt.where(tuple_(*order) < tuple_(*decode_ranked_cursor(page.cursor)))
+    stmt = stmt.order_by(*[col.desc() for col in order]).limit(page.limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        next_cursor = encode_ranked_cursor(last.rank, last.ts, last.kind, last.id)
+
+    highlighted = {}
+    for kind in selected:
+        ids = [r.id for r in rows if r.kind == kind]
+        if ids:
+            highlighted[kind] = await headlines(db, kind, ids, query)
+
+    results = []
+    for r in rows:
+        title, snippet = highlighted[r.kind].get(r.id, (None, None))  # deleted in between
+        results.append(
+            {"type": r.kind, "id": r.id, "timestamp": r.ts, "rank": r.rank, "title": title, "snippet": snippet}
+        )
+    return {"query": q, "results": results, "next_cursor": next_cursor}
@@ -1,13 +1,26 @@
-import json, traceback
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio, json, math, os, traceback
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from mcp.client.streamable_http import streamablehttp_client
-from mcp.client.session import ClientSession
-from app.db.session import get_session
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.orm import load_only
+from app.db.session import get_session, async_session_maker
 from app.models.image import ImageHistory
 from app.models.saved_item import SavedItem
-from app.core.security import get_current_user
+from app.models.user import User
+from app.core.config import get_settings
+from app.core.pagination import PageParams, paginate, split_page
+from app.core.responses import RawJSON, RawJSONResponse, json_row, jsonb_head
+from app.core.analytics import record_activity
+from app.core.assets import AssetStore, asset_response
+from app.core.metrics import register_stats
+from app.core.jobs import JobRunner, JobQueueFullError, TERMINAL_STATUSES
+from app.core.security import get_current_user, require_admin
+from app.core.cache import AsyncTTLCache
+from app.core.ratelimit import rate_limited
+from app.schemas.image import ImageHistoryDetail, ImageHistorySummary, ImageHistorySummaryPage
+from app.routers.mcp_client import mcp_pool, MCPUnavailableError, MCPTimeoutError, MCPToolError
 import httpx
 
 router = APIRouter(prefix="/image", tags=["MCP Image"])
@@ -15,116 +28,538 @@ router = APIRouter(prefix="/image", tags=["MCP Image"])
 
 image_router = router
 
-MCP_IMAGE_URL = "https://server.smithery.ai/@falahgs/flux-imagegen-mcp-server/mcp"
-API_KEY = "73dfbc49-709d-41a2-b868-3ac58a0a2dc4"
-PROFILE = "mixed-viper-NggMmT"
+IMAGE_SERVER = "image"
+mcp_pool.register(
+    IMAGE_SERVER,
+    get_settings().MCP_IMAGE_URL,
+    timeout=get_settings().MCP_IMAGE_CALL_TIMEOUT_SECONDS,
+)
+
+# Workers open their own sessions; tests point this at the test database.
+job_session_maker = async_session_maker
+
+asset_store = AssetStore(
+    get_settings().IMAGE_ASSET_DIR,
+    max_bytes=get_settings().IMAGE_ASSET_MAX_BYTES,
+    thumbnail_size=get_settings().IMAGE_THUMBNAIL_SIZE,
+)
+ASSET_PATH = "/image/assets/"
+IMAGE_MODEL = "flux"
+
+# (user id, normalized prompt, model) -> that user's last image for it. ImageHistory is the
+# source of truth; this per-worker front only saves the lookup and coalesces concurrent jobs.
+image_dedupe = AsyncTTLCache(
+    maxsize=get_settings().IMAGE_DEDUPE_SIZE,
+    ttl=min(get_settings().IMAGE_DEDUPE_CACHE_SECONDS, get_settings().IMAGE_DEDUPE_TTL_SECONDS),
+)
+dedupe_history_hits = 0  # memory misses answered from ImageHistory instead of upstream
+
+
+def dedupe_stats() -> dict:
+    return {**image_dedupe.stats(), "history_hits": dedupe_history_hits}
+
+
+register_stats("image_dedupe", dedupe_stats)
+
+
+def normalize_prompt(prompt: str) -> str:
+    # same as normalized_prompt_sql below
+    return " ".join(prompt.split()).lower()
+
+
+def normalized_prompt_sql(col):
+    return func.lower(func.btrim(func.regexp_replace(col, r"\s+", " ", "g")))
+
+
+async def call_image_tool(prompt: str):
+    tool_names = await mcp_pool.tool_names(IMAGE_SERVER)
+
+    # Prefer "generateImageUrl" if available
+    tool_to_use = "generateImageUrl" if "generateImageUrl" in tool_names else "generateImage"
+
+    print(f" Calling '{tool_to_use}' tool with prompt: {prompt}")
+    res = await mcp_pool.call_tool(IMAGE_SERVER, tool_to_use, {"prompt": prompt, "model": IMAGE_MODEL})
+    outputs = res.dict().get("content", [])
+
+    # Extract image_url safely
+    image_url = None
+    if outputs and isinstance(outputs, list):
+        try:
+            parsed = json.loads(outputs[0]["text"])
+            image_url = parsed.get("imageUrl")
+        except Exception:
+            image_url = None
+
+    return image_url, outputs
+
+
+def failure_status_code(e: Exception) -> int:
+    if isinstance(e, MCPTimeoutError):
+        return 504
+    if isinstance(e, MCPToolError):
+        return 502
+    if isinstance(e, MCPUnavailableError):
+        return 503
+    if isinstance(e, httpx.HTTPStatusError):
+        return 502
+    return 500
+
+
+async def store_image_asset(job_id: int, image_url: str | None) -> tuple[str | None, int | None]:
+    # keep a local copy so history never depends on the upstream URL staying alive
+    if not image_url:
+        return None, None
+    try:
+        digest, size = await asset_store.download(
+            image_url, get_settings().IMAGE_ASSET_DOWNLOAD_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        print(f" Image asset download failed for job {job_id}: {e!r}")
+        return None, None
+    try:
+        await asset_store.thumbnail(digest)
+    except Exception as e:
+        # rendered again on first request
+        print(f" Thumbnail failed for asset {digest}: {e!r}")
+    return digest, size
+
+
+async def generate(job_id: int, prompt: str) -> dict:
+    image_url, outputs = await call_image_tool(prompt)
+    asset_hash, asset_size = await store_image_asset(job_id, image_url)
+    return {
+        "job_id": job_id,
+        "image_url": image_url,
+        "results": outputs,
+        "asset_hash": asset_hash,
+        "asset_size": asset_size,
+    }
+
+
+async def previous_image(user_id: int, prompt: str, model: str) -> dict | None:
+    """The user's latest finished image for the same normalized prompt and model, if recent enough."""
+    since = datetime.now(timezone.utc) - timedelta(seconds=get_settings().IMAGE_DEDUPE_TTL_SECONDS)
+    async with job_session_maker() as db:
+        row = (await db.execute(
+            select(
+                ImageHistory.id, ImageHistory.image_url, ImageHistory.results,
+                ImageHistory.asset_hash, ImageHistory.asset_size,
+            )
+            .where(
+                ImageHistory.user_id == user_id,
+                ImageHistory.timestamp >= since,
+                ImageHistory.status == "done",
+                ImageHistory.image_url != "",
+                func.coalesce(ImageHistory.meta["model"].astext, IMAGE_MODEL) == model,
+                normalized_prompt_sql(ImageHistory.prompt) == normalize_prompt(prompt),
+            )
+            .order_by(ImageHistory.timestamp.desc(), ImageHistory.id.desc())
+            .limit(1)
+        )).first()
+    if row is None:
+        return None
+    return {
+        "job_id": row.id,
+        "image_url": row.image_url,
+        "results": row.results,
+        "asset_hash": row.asset_hash,
+        "asset_size": row.asset_size,
+    }
+
+
+async def generate_or_reuse(job: ImageHistory) -> dict:
+    """Generated image for the job; with dedupe on, the user's repeated prompt reuses their last one."""
+    if not get_settings().IMAGE_DEDUPE_ENABLED:
+        return await generate(job.id, job.prompt)
+
+    model = (job.meta or {}).get("model", IMAGE_MODEL)
+    # per user: dedupe_of points at the reused job, which must be the caller's own
+    key = (job.user_id, normalize_prompt(job.prompt), model)
+
+    async def reuse_or_generate():
+        global dedupe_history_hits
+        previous = await previous_image(job.user_id, job.prompt, model)
+        if previous is not None:
+            dedupe_history_hits += 1
+            return previous
+        return await generate(job.id, job.prompt)
+
+    if (job.meta or {}).get("fresh"):
+        generated = await generate(job.id, job.prompt)
+        image_dedupe.put(key, generated)
+    else:
+        # concurrent jobs for the same prompt share one lookup / upstream call
+        generated = await image_dedupe.get_or_load(key, reuse_or_generate)
+    if not generated["image_url"]:
+        image_dedupe.invalidate(key)
+    return generated
+
+
+def asset_links(asset_hash: str | None) -> dict:
+    if not asset_hash:
+        return {"asset_url": None, "thumbnail_url": None}
+    return {"asset_url": f"{ASSET_PATH}{asset_hash}", "thumbnail_url": f"{ASSET_PATH}{asset_hash}/thumb"}
+
+
+def image_summary(record: ImageHistory) -> ImageHistorySummary:
+    return ImageHistorySummary(
+        id=record.id,
+        prompt=record.prompt,
+        status=record.status,
+        image_url=record.image_url or None,
+        **asset_links(record.asset_hash),
+        error=record.error,
+        timestamp=record.timestamp,
+    )
+
+
+def job_event(job: ImageHistory, **extra) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "prompt": job.prompt,
+        "image_url": job.image_url or None,
+        **asset_links(job.asset_hash),
+        "dedupe_of": (job.meta or {}).get("dedupe_of"),
+        "error": job.error,
+        "timestamp": job.timestamp.isoformat() if job.timestamp else None,
+        "user_id": job.user_id,
+        **extra,
+    }
+
+
+async def fail_image_job(job_id: int, e: Exception):
+    async with job_session_maker() as db:
+        job = await db.get(ImageHistory, job_id)
+        job.status = "failed"
+        job.error = mcp_pool.redact(str(e))
+        await db.commit()
+    extra = {"retry_after": e.retry_after} if getattr(e, "retry_after", None) else {}
+    image_jobs.publish(job_id, job_event(job, code=failure_status_code(e), **extra))
+
+
+async def requeue_image_job(job_id: int):
+    async with job_session_maker() as db:
+        await db.execute(update(ImageHistory).where(ImageHistory.id == job_id).values(status="queued"))
+        await db.commit()
+
+
+async def finish_image_job(job_id: int, generated: dict):
+    async with job_session_maker() as db:
+        job = await db.get(ImageHistory, job_id)
+        image_url, outputs = generated["image_url"], generated["results"]
+        if generated["job_id"] != job.id:
+            job.meta = {**(job.meta or {}), "dedupe_of": generated["job_id"]}
+
+        owner = await db.get(User, job.user_id)
+        job.image_url = image_url or ""
+        job.results = outputs
+        job.asset_hash = generated["asset_hash"]
+        job.asset_size = generated["asset_size"]
+        job.status = "done"
+
+        saved_item = SavedItem(
+            owner_id=job.user_id,
+            item_type="image",
+            title=f"Image: {job.prompt[:30]}",
+            content=image_url or "",
+            name=owner.role if owner else "user",
+        )
+        db.add(saved_item)
+        await record_activity(db, job.user_id, ("image", "save"), term=("image", job.prompt))
+        await db.flush()
+        await db.refresh(saved_item)
+        await db.commit()
+    return job_event(job, results=outputs, saved_item=saved_item.to_dict())
+
+
+async def run_image_job(job_id: int):
+    async with job_session_maker() as db:
+        # claim atomically so a job requeued by another process runs only once
+        claimed = await db.execute(
+            update(ImageHistory)
+            .where(ImageHistory.id == job_id, ImageHistory.status == "queued")
+            .values(status="running")
+        )
+        await db.commit()
+        if claimed.rowcount == 0:
+            return
+        job = await db.get(ImageHistory, job_id)
+    # the session is closed here: no transaction stays open across the upstream call
+    image_jobs.publish(job_id, job_event(job))
+
+    try:
+        generated = await generate_or_reuse(job)
+    except asyncio.CancelledError:
+        # shutting down: hand the job to the next start instead of leaving it "running"
+        await asyncio.shield(requeue_image_job(job_id))
+        raise
+    except Exception as e:
+        print(" MCP ERROR TRACE:", mcp_pool.redact(traceback.format_exc()))
+        await fail_image_job(job_id, e)
+        return
+
+    try:
+        event = await finish_image_job(job_id, generated)
+    except Exception as e:
+        print(f" Image job {job_id} could not be saved: {e!r}")
+        await fail_image_job(job_id, e)
+        return
+    image_jobs.publish(job_id, event)
+
+
+settings = get_settings()
+image_jobs = JobRunner(
+    run_image_job,
+    workers=settings.IMAGE_JOB_WORKERS,
+    queue_size=settings.IMAGE_JOB_QUEUE_SIZE,
+)
+register_stats("image_jobs", lambda: {"queued": image_jobs.pending})
+
+
+async def start_image_jobs():
+    image_jobs.start()
+
+    # pick up jobs that were accepted but never finished before the last shutdown;
+    # "running" rows belong to a worker that is gone (a live one would be mid-startup too)
+    async with job_session_maker() as db:
+        await db.execute(
+            update(ImageHistory).where(ImageHistory.status == "running").values(status="queued")
+        )
+        await db.commit()
+        result = await db.execute(
+            select(ImageHistory.id)
+            .where(ImageHistory.status == "queued")
+            .order_by(ImageHistory.id)
+        )
+        for job_id in result.scalars().all():
+            try:
+                image_jobs.submit(job_id)
+            except JobQueueFullError:
+                break
+
+
+async def create_image_job(prompt: str, db: AsyncSession, current_user, fresh: bool = False) -> ImageHistory:
+    meta = {"model": IMAGE_MODEL}
+    if fresh:
+        meta["fresh"] = True
+    job = ImageHistory(
+        prompt=prompt,
+        meta=meta,
+        status="queued",
+        user_id=int(current_user["sub"]),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def enqueue_image_job(job: ImageHistory, db: AsyncSession):
+    try:
+        image_jobs.submit(job.id)
+    except JobQueueFullError as e:
+        job.status = "failed"
+        job.error = str(e)
+        await db.commit()
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(settings.MCP_ADMISSION_WAIT_SECONDS))},
+        )
+
+
+async def get_own_job(job_id: int, db: AsyncSession, current_user) -> ImageHistory:
+    result = await db.execute(
+        select(ImageHistory).where(
+            ImageHistory.id == job_id,
+            ImageHistory.user_id == int(current_user["sub"]),
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Image job not found")
+    return job
 
 
 @image_router.post("/")
 async def generate_image(
     prompt: str = Query(..., description="Prompt to generate image"),
+    fresh: bool = Query(False, description="Always call the image model, even for a repeated prompt"),
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(rate_limited("image")),
+):
+    # synchronous mode: submit a job and hold the request until it finishes
+    job = await create_image_job(prompt, db, current_user, fresh=fresh)
+    events = image_jobs.subscribe(job.id)
+    try:
+        await enqueue_image_job(job, db)
+    except HTTPException:
+        image_jobs.unsubscribe(job.id, events)
+        raise
+
+    try:
+        event = await image_jobs.wait(job.id, events, settings.IMAGE_JOB_SYNC_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Image generation still running, poll /image/jobs/{job.id}",
+        )
+
+    if event["status"] == "failed":
+        headers = {"Retry-After": str(math.ceil(event["retry_after"]))} if event.get("retry_after") else None
+        raise HTTPException(
+            status_code=event.get("code", 500), detail=f"Image MCP error: {event['error']}", headers=headers
+        )
+
+    return {
+        "job_id": job.id,
+        "prompt": prompt,
+        "image_url": event["image_url"],
+        "asset_url": event["asset_url"],
+        "thumbnail_url": event["thumbnail_url"],
+        "dedupe_of": event["dedupe_of"],
+        "results": event["results"],
+        "timestamp": event["timestamp"],
+        "user_id": int(current_user["sub"]),
+        "saved_item": event["saved_item"],
+    }
+
+
+@image_router.post("/jobs", status_code=202)
+async def submit_image_job(
+    prompt: str = Query(..., description="Prompt to generate image"),
+    fresh: bool = Query(False, description="Always call the image model, even for a repeated prompt"),
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(rate_limited("image")),
+):
+    job = await create_image_job(prompt, db, current_user, fresh=fresh)
+    await enqueue_image_job(job, db)
+    return {"job_id": job.id, "status": job.status}
+
+
+@image_router.get("/cache/stats")
+async def image_dedupe_stats(admin=Depends(require_admin)):
+    return {"enabled": get_settings().IMAGE_DEDUPE_ENABLED, **dedupe_stats()}
+
+
+@image_router.get("/jobs/{job_id}")
+async def get_image_job(
+    job_id: int,
     db: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
+    job = await get_own_job(job_id, db, current_user)
+    return job_event(job, results=job.results)
+
+
+@image_router.get("/jobs/{job_id}/events")
+async def stream_image_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    # subscribe before reading the row so no transition is missed in between
+    events = image_jobs.subscribe(job_id)
     try:
-        url = f"{MCP_IMAGE_URL}?api_key={API_KEY}&profile={PROFILE}"
-        print(f" Connecting to MCP Server: {url}")
-
-        async with streamablehttp_client(url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as sess:
-                await sess.initialize()
-                print(" Session initialized")
-
-                # List tools
-                tools = await sess.list_tools()
-                tool_names = [t.name for t in tools.tools]
-                print(" Available Tools:", tool_names)
-
-                # Prefer "generateImageUrl" if available
-                tool_to_use = "generateImageUrl" if "generateImageUrl" in tool_names else "generateImage"
-
-                print(f" Calling '{tool_to_use}' tool with prompt: {prompt}")
-                res = await sess.call_tool(tool_to_use, {"prompt": prompt, "model": "flux"})
-                outputs = res.dict().get("content", [])
-
-                # Extract image_url safely
-                image_url = None
-                if outputs and isinstance(outputs, list):
-                    try:
-                        parsed = json.loads(outputs[0]["text"])
-                        image_url = parsed.get("imageUrl")
-                    except Exception:
-                        image_url = None
-
-               
-                history = ImageHistory(
-                    prompt=prompt,
-                    image_url=image_url or "",
-                    meta=json.dumps({"model": "flux"}),
-                    results=json.dumps(outputs),
-                    user_id=int(current_user["sub"]),
-                )
-                db.add(history)
-
-     
-                saved_item = SavedItem(
-                    owner_id=int(current_user["sub"]),
-                    item_type="image",
-                    title=f"Image: {prompt[:30]}",
-                    content=image_url or "",  
-                    name=current_user.get("role", "user"),
-                )
-                db.add(saved_item)
-
-                await db.commit()
-                await db.refresh(history)
-                await db.refresh(saved_item)
-
-                return {
-                    "prompt": prompt,
-                    "image_url": image_url,
-                    "results": outputs,
-                    "timestamp": history.timestamp,
-                    "user_id": int(current_user["sub"]),
-                    "saved_item": saved_item.to_dict(), 
-                }
-
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=502, detail=f"Image MCP server unavailable: {str(e)}")
+        job = await get_own_job(job_id, db, current_user)
+    except HTTPException:
+        image_jobs.unsubscribe(job_id, events)
+        raise
+    current = job_event(job, results=job.results)
 
-    except Exception as e:
-        print(" MCP ERROR TRACE:", traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Image MCP error: {str(e)}")
+    async def stream():
+        try:
+            event = current
+            yield f"event: status\ndata: {json.dumps(event)}\n\n"
+            while event["status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(events.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+        finally:
+            image_jobs.unsubscribe(job_id, events)
 
+    return StreamingResponse(stream(), media_type="text/event-stream")
 
 
 @image_router.get("/history")
 async def get_image_history(
+    page: PageParams = Depends(),
+    snippets: int | None = Query(None, ge=0, description="Only return the first N results per entry"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary: no meta or results"),
     db: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(ImageHistory)
+    if view == "summary":
+        # meta / results stay in the database; GET /image/history/{id} loads them for one entry
+        stmt = (
+            select(ImageHistory)
+            .options(load_only(
+                ImageHistory.id,
+                ImageHistory.prompt,
+                ImageHistory.status,
+                ImageHistory.image_url,
+                ImageHistory.asset_hash,
+                ImageHistory.error,
+                ImageHistory.timestamp,
+            ))
+            .where(ImageHistory.user_id == int(current_user["sub"]))
+        )
+        rows = await db.scalars(paginate(stmt, ImageHistory.timestamp, ImageHistory.id, page))
+        history, next_cursor = split_page(rows.all(), page, "timestamp")
+        return ImageHistorySummaryPage(
+            user_id=int(current_user["sub"]),
+            role=current_user["role"],
+            image_history=[image_summary(h) for h in history],
+            next_cursor=next_cursor,
+        )
+
+    results = ImageHistory.results if snippets is None else jsonb_head(ImageHistory.results, snippets)
+    row = json_row(
+        id=ImageHistory.id,
+        prompt=ImageHistory.prompt,
+        image_url=ImageHistory.image_url,
+        # NULL when there is no local copy
+        asset_url=literal(ASSET_PATH) + ImageHistory.asset_hash,
+        thumbnail_url=literal(ASSET_PATH) + ImageHistory.asset_hash + "/thumb",
+        asset_size=ImageHistory.asset_size,
+        meta=ImageHistory.meta,
+        results=results,
+        status=ImageHistory.status,
+        timestamp=ImageHistory.timestamp,
+    )
+    stmt = (
+        select(ImageHistory.id, ImageHistory.timestamp, row.label("row"))
         .where(ImageHistory.user_id == int(current_user["sub"]))
-        .order_by(ImageHistory.timestamp.desc())
     )
-    history = result.scalars().all()
+    result = await db.execute(paginate(stmt, ImageHistory.timestamp, ImageHistory.id, page))
+    history, next_cursor = split_page(result.all(), page, "timestamp")
 
-    return {
+    # rows are encoded by Postgres; results are never decoded in Python
+    return RawJSONResponse({
         "user_id": int(current_user["sub"]),
         "role": current_user["role"],
-        "image_history": [
-            {
-                "id": h.id,
-                "prompt": h.prompt,
-                "image_url": h.image_url,
-                "meta": json.loads(h.meta) if h.meta else None,
-                "results": json.loads(h.results) if h.results else None,
-                "timestamp": h.timestamp,
-            }
-            for h in history
-        ],
-    }
+        "image_history": [RawJSON(h.row) for h in history],
+        "next_cursor": next_cursor,
+    })
+
+
+@image_router.get("/history/{image_id}", response_model=ImageHistoryDetail)
+async def get_image_history_item(
+    image_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    record = await get_own_job(image_id, db, current_user)
+    return ImageHistoryDetail(
+        **image_summary(record).model_dump(),
+        asset_size=record.asset_size,
+        meta=record.meta,
+        results=record.results,
+    )
 
 
 @image_router.delete("/history/{image_id}")
@@ -149,3 +584,31 @@ async def delete_image_history(
 
     return {"status": "deleted", "image_id": image_id}
 
+
+# Assets are addressed by the sha256 of their content, so they are public and
+# cacheable forever: <img> tags can load them without an Authorization header.
+@image_router.get("/assets/{digest}")
+async def get_image_asset(
+    request: Request,
+    digest: str = Path(..., pattern="^[0-9a-f]{64}$"),
+):
+    path = asset_store.path(digest)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset_response(request, path, digest, asset_store.content_type(digest))
+
+
+@image_router.get("/assets/{digest}/thumb")
+async def get_image_thumbnail(
+    request: Request,
+    digest: str = Path(..., pattern="^[0-9a-f]{64}$"),
+):
+    if not os.path.exists(asset_store.path(digest)):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    # a thumbnail that failed at ingest time is rendered now
+    try:
+        path = await asset_store.thumbnail(digest)
+    except Exception as e:
+        print(f" Thumbnail failed for asset {digest}: {e!r}")
+        raise HTTPException(status_code=415, detail="Asset is not a decodable image")
+    return asset_response(request, path, f"{digest}-thumb", "image/webp")
@@ -1,73 +1,401 @@
 import asyncio
-import json
-from urllib.parse import urlparse
-
-MCP_URL = "https://server.smithery.ai/@nickclyde/duckduckgo-mcp-server/mcp?api_key=6aa8df08-ffd6-46a7-9036-f9b28a29871e&profile=mixed-viper-NggMmT"
-
-async def run_mcp(query: str):
-    url = urlparse(MCP_URL)
-    host = url.hostname
-    port = 443 if url.scheme == "https" else 80
-    path = url.path + ("?" + url.query if url.query else "")
-
-    reader, writer = await asyncio.open_connection(host, port, ssl=True)
-
-    # Prepare HTTP headers (keep-alive)
-    headers = (
-        f"POST {path} HTTP/1.1\r\n"
-        f"Host: {host}\r\n"
-        "Content-Type: application/json\r\n"
-        "Accept: application/json, text/event-stream\r\n"
-        "Connection: keep-alive\r\n"
-        "\r\n"
-    )
-
-    writer.write(headers.encode())
-    await writer.drain()
-
-    # 1️⃣ Send initialize
-    init_msg = {
-        "jsonrpc": "2.0",
-        "id": "1",
-        "method": "initialize",
-        "params": {
-            "protocolVersion": "2024-01-01",
-            "capabilities": {},
-            "clientInfo": {"name": "fastapi-client", "version": "0.1.0"},
-        },
-    }
-    body = json.dumps(init_msg) + "\n"
-    writer.write(body.encode())
-    await writer.drain()
-    print("➡️ Sent initialize")
-
-    # 2️⃣ Send search
-    await asyncio.sleep(1)
-    search_msg = {
-        "jsonrpc": "2.0",
-        "id": "2",
-        "method": "tools/call",
-        "params": {"name": "search", "arguments": {"query": query}},
-    }
-    body = json.dumps(search_msg) + "\n"
-    writer.write(body.encode())
-    await writer.drain()
-    print("➡️ Sent search")
-
-    # 3️⃣ Read SSE response
-    while True:
-        line = await reader.readline()
-        if not line:
-            break
-        line = line.decode().strip()
-        if line.startswith("data: "):
+import itertools
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Callable
+from urllib.parse import urlsplit
+
+import anyio
+import httpx
+from mcp.client.streamable_http import streamablehttp_client
+from mcp import types
+from mcp.client.session import ClientSession
+
+from app.core.config import get_settings
+from app.core.metrics import background_task, mcp_phase, register_stats
+from app.core.ratelimit import AdmissionController, OverloadedError
+from app.core.resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+# Errors that mean the underlying stream is gone and the session must be rebuilt.
+# Tool-level failures (McpError etc.) leave the session usable.
+TRANSPORT_ERRORS = (
+    OSError,
+    httpx.HTTPError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    asyncio.TimeoutError,
+)
+
+
+class MCPUnavailableError(Exception):
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # set when callers should back off for a known time
+
+
+class MCPOverloadedError(MCPUnavailableError):
+    pass
+
+
+class MCPCircuitOpenError(MCPUnavailableError):
+    pass
+
+
+class MCPTimeoutError(MCPUnavailableError):
+    pass
+
+
+class MCPToolError(MCPUnavailableError):
+    """The server answered, but the tool reported a failure (CallToolResult.isError)."""
+
+
+class CallPolicy:
+    def __init__(self, timeout: float, retries: int, retry_timeouts: bool, hedge_after: float):
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_timeouts = retry_timeouts  # only safe for idempotent tools
+        self.hedge_after = hedge_after  # 0 = never send a hedged second request
+
+
+# progress token -> callback for calls that asked for progress notifications.
+# Tokens are unique per call, so one registry serves every session.
+progress_listeners: dict[str, Callable] = {}
+
+
+async def dispatch_progress(message):
+    if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ProgressNotification):
+        params = message.root.params
+        listener = progress_listeners.get(params.progressToken)
+        if listener is not None:
+            listener(params)
+
+
+class MCPConnection:
+    """A single initialized MCP session kept open by a background task."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.session: ClientSession | None = None
+        self.tool_names: list[str] = []
+        self.last_error: Exception | None = None
+        self._loop = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def safe_url(self) -> str:
+        # the query string carries the API key; never log or return it
+        return urlsplit(self.url)._replace(query="").geturl()
+
+    def redact(self, text: str) -> str:
+        return text.replace(self.url, self.safe_url)
+
+    @property
+    def ready(self) -> bool:
+        return self.session is not None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task and not self._task.done():
+            return
+        # (re)bind to the running loop; test clients spin up one loop per test
+        self._loop = loop
+        self._closing = False
+        self._ready = asyncio.Event()
+        self._reset = asyncio.Event()
+        self.session = None
+        self._task = background_task(self._run())
+
+    async def _run(self):
+        settings = get_settings()
+        backoff = settings.MCP_RECONNECT_MIN_SECONDS
+        while not self._closing:
             try:
-                event = json.loads(line.replace("data: ", ""))
-                print("📩 EVENT:", json.dumps(event, indent=2))
-            except Exception:
-                print("⚠️ RAW:", line)
+                async with AsyncExitStack() as stack:
+                    with mcp_phase(self.name, "connect"):
+                        read_stream, write_stream, _ = await stack.enter_async_context(streamablehttp_client(self.url))
+                        sess = await stack.enter_async_context(
+                            ClientSession(read_stream, write_stream, message_handler=dispatch_progress)
+                        )
+                    with mcp_phase(self.name, "initialize"):
+                        await sess.initialize()
+                    with mcp_phase(self.name, "list_tools"):
+                        tools = await sess.list_tools()
+                    self.tool_names = [t.name for t in tools.tools]
+                    self.session = sess
+                    self.last_error = None
+                    self._reset.clear()
+                    self._ready.set()
+                    print(f" MCP [{self.name}] connected to {self.safe_url}, tools: {self.tool_names}")
+                    backoff = settings.MCP_RECONNECT_MIN_SECONDS
+
+                    # hold the session open until a borrower reports it broken
+                    await self._reset.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = e
+                print(f" MCP [{self.name}] connection failed: {self.redact(repr(e))}")
+            finally:
+                self._ready.clear()
+                self.session = None
+
+            # the transport's anyio task groups can swallow a cancel aimed at us; honour it
+            if asyncio.current_task().cancelling():
+                raise asyncio.CancelledError
+            if not self._closing:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, settings.MCP_RECONNECT_MAX_SECONDS)
+
+    def mark_broken(self, sess: ClientSession):
+        # ignore late reports about a session that has already been replaced
+        if self.session is sess:
+            # stop lending it out right away, before the task gets to reconnect
+            self.session = None
+            self._ready.clear()
+            self._reset.set()
+
+    async def wait_ready(self, timeout: float) -> ClientSession:
+        self.start()
+        try:
+            # another borrower may mark the session broken between the wakeup and here
+            while self.session is None:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise MCPUnavailableError(
+                f"MCP server '{self.name}' not reachable: {self.redact(str(self.last_error or 'connect timeout'))}"
+            )
+        return self.session
+
+    async def close(self):
+        if not self._task:
+            return
+        self._closing = True
+        self._reset.set()
+        try:
+            await asyncio.wait_for(self._task, 5)
+        except (asyncio.CancelledError, Exception):
+            self._task.cancel()
+        self._task = None
+
+
+class MCPPool:
+    """App-lifetime pool of warm MCP sessions, keyed by upstream server name."""
+
+    def __init__(self):
+        self._servers: dict[str, list[MCPConnection]] = {}
+        self._cursors: dict[str, itertools.count] = {}
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.policies: dict[str, CallPolicy] = {}
+        self.hedged = 0
+        self.retried = 0
+        settings = get_settings()
+        # one budget for every upstream: bounds outbound calls per worker
+        self.admission = AdmissionController(
+            settings.MCP_MAX_CONCURRENT_CALLS,
+            settings.MCP_MAX_WAITING_CALLS,
+            settings.MCP_ADMISSION_WAIT_SECONDS,
+        )
+
+    def register(
+        self,
+        name: str,
+        url: str,
+        size: int | None = None,
+        *,
+        timeout: float,
+        retry_timeouts: bool = False,
+        hedge_after: float = 0.0,
+    ):
+        settings = get_settings()
+        size = size or settings.MCP_POOL_SIZE
+        self._servers[name] = [MCPConnection(name, url) for _ in range(size)]
+        self._cursors[name] = itertools.count()
+        self.breakers[name] = CircuitBreaker(
+            name, settings.MCP_BREAKER_FAILURE_THRESHOLD, settings.MCP_BREAKER_RESET_SECONDS
+        )
+        self.policies[name] = CallPolicy(timeout, settings.MCP_RETRY_ATTEMPTS, retry_timeouts, hedge_after)
+        register_stats(f"mcp_breaker_{name}", self.breakers[name].stats)
+
+    def connections(self, name: str) -> list[MCPConnection]:
+        try:
+            return self._servers[name]
+        except KeyError:
+            raise MCPUnavailableError(f"Unknown MCP server '{name}'")
+
+    async def start(self):
+        # connect in the background so a slow upstream never blocks app startup
+        for conns in self._servers.values():
+            for conn in conns:
+                conn.start()
+
+    async def close(self):
+        for conns in self._servers.values():
+            for conn in conns:
+                await conn.close()
+
+    def _pick(self, name: str) -> MCPConnection:
+        conns = self.connections(name)
+        start = next(self._cursors[name]) % len(conns)
+        ordered = conns[start:] + conns[:start]
+        for conn in ordered:
+            if conn.ready:
+                return conn
+        return ordered[0]
+
+    @asynccontextmanager
+    async def session(self, name: str):
+        conn = self._pick(name)
+        sess = await conn.wait_ready(get_settings().MCP_CONNECT_TIMEOUT_SECONDS)
+        try:
+            yield sess
+        except TRANSPORT_ERRORS:
+            conn.mark_broken(sess)
+            raise
+
+    def _circuit_open(self, name: str, e: CircuitOpenError) -> MCPCircuitOpenError:
+        return MCPCircuitOpenError(f"MCP server '{name}' is failing, circuit open", e.retry_after)
+
+    async def tool_names(self, name: str) -> list[str]:
+        breaker = self.breakers[name]
+        try:
+            breaker.check()
+        except CircuitOpenError as e:
+            raise self._circuit_open(name, e) from e
+        conn = self._pick(name)
+        try:
+            await conn.wait_ready(get_settings().MCP_CONNECT_TIMEOUT_SECONDS)
+        except MCPUnavailableError as e:
+            breaker.record_failure(e)
+            raise
+        return list(conn.tool_names)
+
+    async def _send(self, sess: ClientSession, tool: str, arguments: dict, progress_token: str | None):
+        if progress_token is None:
+            return await sess.call_tool(tool, arguments)
+        # ClientSession.call_tool can't attach _meta; build the request so the server sends progress
+        params = types.CallToolRequestParams(
+            name=tool, arguments=arguments, _meta=types.RequestParams.Meta(progressToken=progress_token)
+        )
+        request = types.ClientRequest(types.CallToolRequest(method="tools/call", params=params))
+        return await sess.send_request(request, types.CallToolResult)
+
+    async def _attempt(self, name: str, tool: str, arguments: dict, timeout: float, progress_token: str | None = None):
+        try:
+            async with self.admission.slot():
+                async with self.session(name) as sess:
+                    with mcp_phase(name, "call_tool"):
+                        try:
+                            result = await asyncio.wait_for(self._send(sess, tool, arguments, progress_token), timeout)
+                        except asyncio.TimeoutError:
+                            # only this call is slow, the session itself is fine: don't reconnect
+                            raise MCPTimeoutError(f"MCP server '{name}' did not answer '{tool}' within {timeout:g}s")
+                        if result.isError:
+                            # tool failures come back as content, not as an exception; never let
+                            # callers cache or store the error text as if it were a result
+                            detail = " ".join(getattr(c, "text", "") for c in result.content) or "no details"
+                            raise MCPToolError(f"MCP server '{name}' tool '{tool}' failed: {self.redact(detail)}")
+                        return result
+        except OverloadedError as e:
+            raise MCPOverloadedError(f"MCP server '{name}' overloaded: {e}", e.retry_after) from e
+
+    async def _hedged(self, name: str, tool: str, arguments: dict, policy: CallPolicy, progress_token: str | None):
+        if not policy.hedge_after:
+            return await self._attempt(name, tool, arguments, policy.timeout, progress_token)
+
+        # tail-latency hedge: if the first call is slow, race a second one and keep the winner
+        tasks = {asyncio.ensure_future(self._attempt(name, tool, arguments, policy.timeout, progress_token))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=policy.hedge_after)
+            if not done:
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(self._attempt(name, tool, arguments, policy.timeout, progress_token)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _is_failure(self, e: Exception) -> bool:
+        # upstream down or hanging; tool-level errors and our own overload don't count
+        return isinstance(e, TRANSPORT_ERRORS + (MCPUnavailableError,)) and not isinstance(e, MCPOverloadedError)
+
+    async def call_tool(self, name: str, tool: str, arguments: dict, on_progress=None):
+        """Call a tool with retries, hedging and the circuit breaker.
+
+        `on_progress(params)` receives the server's progress notifications for this call
+        (params.progress, params.total); retries and hedges share one progress token.
+        """
+        if on_progress is None:
+            return await self._call_tool(name, tool, arguments, None)
+        token = uuid.uuid4().hex
+        progress_listeners[token] = on_progress
+        try:
+            return await self._call_tool(name, tool, arguments, token)
+        finally:
+            progress_listeners.pop(token, None)
+
+    async def _call_tool(self, name: str, tool: str, arguments: dict, progress_token: str | None):
+        breaker = self.breakers[name]
+        policy = self.policies[name]
+        settings = get_settings()
+        for attempt in range(policy.retries + 1):
+            try:
+                probe = breaker.before_call()
+            except CircuitOpenError as e:
+                raise self._circuit_open(name, e) from e
+            try:
+                result = await self._hedged(name, tool, arguments, policy, progress_token)
+            except Exception as e:
+                if not self._is_failure(e):
+                    raise
+                breaker.record_failure(e)
+                retryable = policy.retry_timeouts or not isinstance(e, MCPTimeoutError)
+                if not retryable or attempt == policy.retries:
+                    raise
+                self.retried += 1
+                print(f" MCP [{name}] {tool} failed ({self.redact(repr(e))}), retry {attempt + 1}/{policy.retries}")
+            else:
+                breaker.record_success()
+                return result
+            finally:
+                breaker.release(probe)
+            await asyncio.sleep(backoff_delay(attempt, settings.MCP_RETRY_BASE_SECONDS, settings.MCP_RETRY_MAX_SECONDS))
+
+    def redact(self, text: str) -> str:
+        for conns in self._servers.values():
+            for conn in conns:
+                text = conn.redact(text)
+        return text
+
+    def status(self) -> dict:
+        return {
+            name: {
+                "breaker": {
+                    **self.breakers[name].stats(),
+                    "last_failure": self.redact(self.breakers[name].last_failure or "") or None,
+                },
+                "connections": [
+                    {"ready": c.ready, "tools": c.tool_names, "last_error": c.redact(repr(c.last_error)) if c.last_error else None}
+                    for c in conns
+                ],
+            }
+            for name, conns in self._servers.items()
+        }
 
+    def stats(self) -> dict:
+        return {"hedged": self.hedged, "retried": self.retried}
 
-if __name__ == "__main__":
-    asyncio.run(run_mcp("what is AI"))
 
+mcp_pool = MCPPool()
+register_stats("mcp_admission", mcp_pool.admission.stats)
+register_stats("mcp_calls", mcp_pool.stats)
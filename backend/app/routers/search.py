@@ -1,114 +1,426 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.session import get_session
-from app.models.search import SearchHistory
+from datetime import datetime, timezone
+from sqlalchemy import select, insert
+from sqlalchemy.orm import load_only
+from app.db.session import get_session, async_session_maker
+from app.models.search import SearchHistory, SearchResult
 from app.models.saved_item import SavedItem
-from app.core.security import get_current_user
+from app.core.security import get_current_user, require_admin
+from app.core.config import get_settings
+from app.core.cache import AsyncTTLCache
+from app.core.analytics import record_activities
+from app.core.result_store import store_results
+from app.core.write_behind import WriteBehindQueue
+from app.core.metrics import background_task, register_stats
+from app.core.pagination import PageParams, paginate, split_page
+from app.core.responses import RawJSON, RawJSONResponse, json_row, jsonb_head
 
-from mcp.client.streamable_http import streamablehttp_client
-from mcp.client.session import ClientSession
+from app.core.ratelimit import rate_limited, take_token
+from app.schemas.search import (
+    BatchSearchRequest,
+    SearchHistoryDetail,
+    SearchHistorySummary,
+    SearchHistorySummaryPage,
+)
+from app.routers.mcp_client import mcp_pool, MCPUnavailableError, MCPTimeoutError, MCPToolError
+import asyncio
 import json
+import math
 router = APIRouter(prefix="/search", tags=["MCP Search"])
 
 search_router = router
 
 
-MCP_URL = "https://server.smithery.ai/@nickclyde/duckduckgo-mcp-server/mcp"
-API_KEY = "775e8343-7c8c-47b0-8d12-93f9b45c293c"
-PROFILE = "developing-marten-gJ1abJ"
+settings = get_settings()
+
+SEARCH_SERVER = "search"
+# search is idempotent: timeouts may be retried and slow calls hedged
+mcp_pool.register(
+    SEARCH_SERVER,
+    settings.MCP_SEARCH_URL,
+    timeout=settings.MCP_SEARCH_CALL_TIMEOUT_SECONDS,
+    retry_timeouts=True,
+    hedge_after=settings.MCP_SEARCH_HEDGE_AFTER_SECONDS,
+)
+
+search_cache = AsyncTTLCache(
+    maxsize=settings.SEARCH_CACHE_SIZE,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    stale_ttl=settings.SEARCH_CACHE_STALE_SECONDS,
+)
+register_stats("search_cache", search_cache.stats)
 
 
 #
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+async def fetch_search_results(query: str, max_results: int, on_progress=None) -> list:
+    # Check tools (cached by the pool at connect time)
+    tool_names = await mcp_pool.tool_names(SEARCH_SERVER)
+    if "search" not in tool_names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tool 'search' not found. Available: {tool_names}",
+        )
+
+    res = await mcp_pool.call_tool(
+        SEARCH_SERVER, "search", {"query": query, "max_results": max_results}, on_progress=on_progress
+    )
+    return res.dict().get("content", [])
+
+
+async def cached_search(query: str, max_results: int, on_progress=None) -> list:
+    # identical queries share one entry and one in-flight upstream call;
+    # progress only reaches the caller that started the upstream call
+    key = (normalize_query(query), max_results)
+    return await search_cache.get_or_load(key, lambda: fetch_search_results(query, max_results, on_progress))
+
+
+async def persist_searches(records: list[dict]) -> list[dict]:
+    """Write-behind flush: one multi-row INSERT ... RETURNING per table for the batch."""
+    async with history_session_maker() as db:
+        # repeated outputs (popular queries) are stored once and referenced by hash
+        result_hashes = await store_results(db, [r["outputs"] for r in records])
+        history_ids = await db.scalars(
+            insert(SearchHistory).returning(SearchHistory.id, sort_by_parameter_order=True),
+            [
+                {"query": r["query"], "result_hash": h, "user_id": r["user_id"], "timestamp": r["timestamp"]}
+                for r, h in zip(records, result_hashes)
+            ],
+        )
+        history_ids = history_ids.all()
+
+        saved_ids = await db.scalars(
+            insert(SavedItem).returning(SavedItem.id, sort_by_parameter_order=True),
+            [
+                {
+                    "owner_id": r["user_id"],
+                    "item_type": "search",
+                    "title": f"Search: {r['query'][:30]}",
+                    "content": json.dumps(r["outputs"][:1]) if r["outputs"] else "",
+                    "name": r["role"],
+                    "created_at": r["timestamp"],
+                }
+                for r in records
+            ],
+        )
+        saved_ids = saved_ids.all()
+
+        await record_activities(
+            db, [(r["user_id"], ("search", "save"), ("search", r["query"]), r["timestamp"]) for r in records]
+        )
+        await db.commit()
+
+    return [
+        {"history_id": h, "saved_item_id": s}
+        for h, s in zip(history_ids, saved_ids)
+    ]
+
+
+# Flushed in the background; tests point the session maker at the test database.
+history_session_maker = async_session_maker
+history_writer = WriteBehindQueue(
+    "search_history",
+    persist_searches,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    interval=settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+)
+register_stats("search_history_writer", history_writer.stats)
+
+
 @search_router.get("/")
 async def search_duckduckgo(
     query: str = Query(..., description="Search query string"),
-    db: AsyncSession = Depends(get_session),
-    current_user=Depends(get_current_user),
+    max_results: int = Query(5, ge=1, le=20, description="Max results to return"),
+    wait_for_persist: bool = Query(False, description="Wait until history is stored and return saved_item_id"),
+    current_user=Depends(rate_limited("search")),
 ):
     try:
-        url = f"{MCP_URL}?api_key={API_KEY}&profile={PROFILE}"
-
-        async with streamablehttp_client(url) as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as sess:
-                # Init MCP
-                await sess.initialize()
-
-                # Check tools
-                tools = await sess.list_tools()
-                tool_names = [t.name for t in tools.tools]
-                if "search" not in tool_names:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Tool 'search' not found. Available: {tool_names}",
-                    )
-
-                # Call tool
-                res = await sess.call_tool("search", {"query": query, "max_results": 5})
-                outputs = res.dict().get("content", [])
-
-          
-                history = SearchHistory(
-                    query=query,
-                    results=json.dumps(outputs),
-                    user_id=int(current_user["sub"]),
-                )
-                db.add(history)
-
-         
-                saved_item = SavedItem(
-                    owner_id=int(current_user["sub"]),
-                    item_type="search",
-                    title=f"Search: {query[:30]}",
-                    content=json.dumps(outputs[:1]) if outputs else "",
-                    name=current_user.get("role", "user"),
-                )
-                db.add(saved_item)
-
-                await db.commit()
-                await db.refresh(history)
-                await db.refresh(saved_item)
-
-                return {
-                    "query": query,
-                    "results": outputs,
-                    "timestamp": history.timestamp,
-                    "user_id": int(current_user["sub"]),
-                    "saved_item_id": saved_item.id,
-                }
+        outputs = await cached_search(query, max_results)
+
+        # history + SavedItem are written behind the response
+        timestamp = datetime.now(timezone.utc)
+        persisted = history_writer.submit({
+            "query": query,
+            "outputs": outputs,
+            "user_id": int(current_user["sub"]),
+            "role": current_user.get("role", "user"),
+            "timestamp": timestamp,
+        })
+        saved_item_id = (await persisted)["saved_item_id"] if wait_for_persist else None
+
+        return {
+            "query": query,
+            "results": outputs,
+            "timestamp": timestamp,
+            "user_id": int(current_user["sub"]),
+            "saved_item_id": saved_item_id,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        status_code, detail, headers = search_failure(e)
+        raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+
+
+def search_failure(e: Exception) -> tuple[int, str, dict | None]:
+    """(status code, detail, headers) for a failed search."""
+    if isinstance(e, HTTPException):
+        return e.status_code, e.detail, e.headers
+    if isinstance(e, MCPTimeoutError):
+        return 504, str(e), None
+    if isinstance(e, MCPToolError):
+        return 502, str(e), None
+    if isinstance(e, MCPUnavailableError):
+        return 503, str(e), {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+    return 500, f"MCP error: {mcp_pool.redact(str(e))}", None
+
+
+# streamed searches run detached from the response so a client that disconnects
+# mid-stream doesn't cancel upstream calls other callers share, or lose history
+detached_tasks: set[asyncio.Task] = set()
+
+
+def detach(coro) -> asyncio.Task:
+    task = background_task(coro)
+    detached_tasks.add(task)
+    task.add_done_callback(detached_tasks.discard)
+    return task
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def run_batch(queries: list[str], max_results: int, current_user, events: asyncio.Queue):
+    """Search all queries concurrently, emit each outcome as it completes, then persist in one transaction."""
+    user_id = int(current_user["sub"])
+    limit = asyncio.Semaphore(settings.SEARCH_BATCH_CONCURRENCY)
+    records: dict[int, dict] = {}
+
+    async def one(index: int, query: str):
+        # every query in the batch spends a token of the caller's search budget
+        allowed, retry_after = await take_token("search", user_id)
+        if not allowed:
+            await events.put({
+                "index": index, "query": query, "status": 429,
+                "error": "Rate limit exceeded for search", "retry_after": math.ceil(retry_after),
+            })
+            return
+        try:
+            async with limit:
+                outputs = await cached_search(query, max_results)
+        except Exception as e:
+            status_code, detail, _ = search_failure(e)
+            await events.put({"index": index, "query": query, "status": status_code, "error": detail})
+            return
+        timestamp = datetime.now(timezone.utc)
+        records[index] = {
+            "query": query,
+            "outputs": outputs,
+            "user_id": user_id,
+            "role": current_user.get("role", "user"),
+            "timestamp": timestamp,
+        }
+        await events.put({
+            "index": index, "query": query, "status": 200, "results": outputs, "timestamp": timestamp.isoformat(),
+        })
 
+    done = {"done": True, "succeeded": 0, "failed": len(queries), "saved_item_ids": None}
+    try:
+        await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+        done.update(succeeded=len(records), failed=len(queries) - len(records))
+        if records:
+            order = sorted(records)
+            try:
+                persisted = await persist_searches([records[i] for i in order])
+                saved = {i: p["saved_item_id"] for i, p in zip(order, persisted)}
+                done["saved_item_ids"] = [saved.get(i) for i in range(len(queries))]
+            except Exception as e:
+                print(f" Batch search persist failed: {e!r}")
+                done["error"] = "Results could not be saved to history"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"MCP error: {str(e)}")
+        print(f" Batch search failed: {e!r}")
+        done["error"] = "Batch search failed"
+    finally:
+        # the response streams until it sees this event; never leave it waiting
+        events.put_nowait(done)
+
+
+@search_router.post("/batch")
+async def batch_search(
+    body: BatchSearchRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    current_user=Depends(get_current_user),
+):
+    if len(body.queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=422, detail=f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per batch")
+    if any(not q.strip() for q in body.queries):
+        raise HTTPException(status_code=422, detail="Queries must not be empty")
+
+    events: asyncio.Queue = asyncio.Queue()
+    detach(run_batch(body.queries, body.max_results, current_user, events))
+
+    def encode(event: dict) -> str:
+        if format == "sse":
+            return sse("done" if event.get("done") else "result", event)
+        return json.dumps(event) + "\n"
+
+    async def stream():
+        while True:
+            event = await events.get()
+            yield encode(event)
+            if event.get("done"):
+                break
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+@search_router.get("/stream")
+async def stream_search(
+    query: str = Query(..., description="Search query string"),
+    max_results: int = Query(5, ge=1, le=20, description="Max results to return"),
+    current_user=Depends(rate_limited("search")),
+):
+    """Same search as GET /search/, as Server-Sent Events.
+
+    `status` is sent at once, then `progress` while the MCP server reports it, one `result`
+    per item when the call returns, and `done` (with saved_item_id) once history is stored.
+    Failures end the stream with an `error` event.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(params):
+        events.put_nowait({"progress": params.progress, "total": params.total, "message": getattr(params, "message", None)})
+
+    async def stream():
+        yield sse("status", {"query": query, "stage": "searching"})
+        search = detach(cached_search(query, max_results, on_progress))
+        search.add_done_callback(lambda _: events.put_nowait(None))
+
+        while True:
+            try:
+                progress = await asyncio.wait_for(events.get(), 15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if progress is None:
+                break
+            yield sse("progress", progress)
+
+        try:
+            outputs = search.result()
+        except Exception as e:
+            status_code, detail, headers = search_failure(e)
+            retry_after = int(headers["Retry-After"]) if headers and "Retry-After" in headers else None
+            yield sse("error", {"status": status_code, "detail": detail, "retry_after": retry_after})
+            return
+
+        for index, item in enumerate(outputs):
+            yield sse("result", {"index": index, "item": item})
+
+        # history is stored after every result has been sent
+        timestamp = datetime.now(timezone.utc)
+        persisted = history_writer.submit({
+            "query": query,
+            "outputs": outputs,
+            "user_id": int(current_user["sub"]),
+            "role": current_user.get("role", "user"),
+            "timestamp": timestamp,
+        })
+        yield sse("done", {
+            "query": query,
+            "count": len(outputs),
+            "timestamp": timestamp.isoformat(),
+            "saved_item_id": (await persisted)["saved_item_id"],
+        })
 
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+
+@search_router.get("/cache/stats")
+async def search_cache_stats(admin=Depends(require_admin)):
+    return search_cache.stats()
 
 
 @search_router.get("/history")
 async def get_search_history(
+    page: PageParams = Depends(),
+    snippets: int | None = Query(None, ge=0, description="Only return the first N results per entry"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary: id, query and time only"),
     db: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(SearchHistory)
+    user_id = int(current_user["sub"])
+    await history_writer.barrier(lambda r: r["user_id"] == user_id)
+
+    if view == "summary":
+        # results stay in the database; GET /search/history/{id} loads them for one entry
+        stmt = (
+            select(SearchHistory)
+            .options(load_only(SearchHistory.id, SearchHistory.query, SearchHistory.timestamp))
+            .where(SearchHistory.user_id == user_id)
+        )
+        rows = await db.scalars(paginate(stmt, SearchHistory.timestamp, SearchHistory.id, page))
+        history, next_cursor = split_page(rows.all(), page, "timestamp")
+        return SearchHistorySummaryPage(
+            user_id=user_id,
+            role=current_user["role"],
+            search_history=[SearchHistorySummary.model_validate(h) for h in history],
+            next_cursor=next_cursor,
+        )
+
+    results = SearchResult.payload if snippets is None else jsonb_head(SearchResult.payload, snippets)
+    row = json_row(
+        id=SearchHistory.id,
+        query=SearchHistory.query,
+        results=results,
+        timestamp=SearchHistory.timestamp,
+    )
+    stmt = (
+        select(SearchHistory.id, SearchHistory.timestamp, row.label("row"))
+        .join(SearchResult, SearchResult.hash == SearchHistory.result_hash)
         .where(SearchHistory.user_id == int(current_user["sub"]))
-        .order_by(SearchHistory.timestamp.desc())
     )
-    history = result.scalars().all()
+    result = await db.execute(paginate(stmt, SearchHistory.timestamp, SearchHistory.id, page))
+    history, next_cursor = split_page(result.all(), page, "timestamp")
 
-    return {
+    # rows are encoded by Postgres; results are never decoded in Python
+    return RawJSONResponse({
         "user_id": int(current_user["sub"]),
         "role": current_user["role"],
-        "search_history": [
-            {
-                "id": h.id,
-                "query": h.query,
-                "results": json.loads(h.results),
-                "timestamp": h.timestamp,
-            }
-            for h in history
-        ],
-    }
+        "search_history": [RawJSON(h.row) for h in history],
+        "next_cursor": next_cursor,
+    })
 __all__ = ["search_router"]
 
+@search_router.get("/history/{search_id}", response_model=SearchHistoryDetail)
+async def get_search_history_item(
+    search_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    user_id = int(current_user["sub"])
+    await history_writer.barrier(lambda r: r["user_id"] == user_id)
+
+    result = await db.execute(
+        select(SearchHistory.id, SearchHistory.query, SearchHistory.timestamp, SearchResult.payload)
+        .join(SearchResult, SearchResult.hash == SearchHistory.result_hash)
+        .where(SearchHistory.id == search_id, SearchHistory.user_id == user_id)
+    )
+    record = result.one_or_none()
+    if not record:
+        raise HTTPException(status_code=404, detail="Search record not found")
+    return SearchHistoryDetail(id=record.id, query=record.query, timestamp=record.timestamp, results=record.payload)
+
+
 @search_router.delete("/history/{search_id}")
 async def delete_search_history(
     search_id: int,
@@ -126,6 +438,7 @@ async def delete_search_history(
     if not record:
         raise HTTPException(status_code=404, detail="Search record not found")
 
+    # the result blob loses a reference in the delete trigger and goes when unused
     await db.delete(record)
     await db.commit()
 
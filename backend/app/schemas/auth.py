@@ -13,6 +13,10 @@ class UserLogin(UserBase):
     password: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
+
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class ImageHistorySummary(BaseModel):
+    id: int
+    prompt: str
+    status: str
+    image_url: str | None = None
+    asset_url: str | None = None
+    thumbnail_url: str | None = None
+    error: str | None = None
+    timestamp: datetime
+
+
+class ImageHistorySummaryPage(BaseModel):
+    user_id: int
+    role: str
+    image_history: list[ImageHistorySummary]
+    next_cursor: str | None = None
+
+
+class ImageHistoryDetail(ImageHistorySummary):
+    asset_size: int | None = None
+    meta: dict[str, Any] | None = None
+    results: list[Any] | None = None
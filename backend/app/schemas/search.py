@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1)
+    max_results: int = Field(5, ge=1, le=20)
+
+
+class SearchHistorySummary(BaseModel):
+    id: int
+    query: str
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SearchHistorySummaryPage(BaseModel):
+    user_id: int
+    role: str
+    search_history: list[SearchHistorySummary]
+    next_cursor: str | None = None
+
+
+class SearchHistoryDetail(SearchHistorySummary):
+    results: list[Any]
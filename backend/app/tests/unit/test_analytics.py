@@ -0,0 +1,23 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+from app.core.analytics import buckets, normalize_term, TOTAL_BUCKET
+
+
+def test_buckets_truncate_in_utc():
+    when = datetime(2025, 3, 4, 1, 30, 15, tzinfo=timezone(timedelta(hours=5)))
+    result = dict(buckets(when))
+
+    assert result["hour"] == datetime(2025, 3, 3, 20, 0, tzinfo=timezone.utc)
+    assert result["day"] == datetime(2025, 3, 3, tzinfo=timezone.utc)
+    assert result["total"] == TOTAL_BUCKET
+
+
+def test_normalize_term():
+    assert normalize_term("  FastAPI   Tutorial ") == "fastapi tutorial"
+    assert len(normalize_term("x" * 500)) == 200
+
+
+@pytest.mark.asyncio
+async def test_analytics_requires_admin(async_client):
+    resp = await async_client.get("/dashboard/admin/analytics/summary")
+    assert resp.status_code == 401
@@ -0,0 +1,55 @@
+import hashlib
+import pytest
+from fastapi import HTTPException
+from app.core.assets import parse_range
+from app.routers import image
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+async def chunks(data: bytes, size: int = 100):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=0-5000", 1000) == (0, 999)
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=1000-", 1000)
+    assert exc.value.status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_store_is_content_addressed():
+    digest, size = await image.asset_store.write(chunks(PNG))
+    assert digest == hashlib.sha256(PNG).hexdigest()
+    assert size == len(PNG)
+    # same bytes, same file
+    assert await image.asset_store.write(chunks(PNG, 7)) == (digest, size)
+
+
+@pytest.mark.asyncio
+async def test_asset_conditional_and_range_requests(async_client):
+    digest, size = await image.asset_store.write(chunks(PNG))
+
+    resp = await async_client.get(f"/image/assets/{digest}")
+    assert resp.status_code == 200
+    assert resp.content == PNG
+    assert resp.headers["content-type"] == "image/png"
+    assert resp.headers["etag"] == f'"{digest}"'
+    assert "immutable" in resp.headers["cache-control"]
+
+    resp = await async_client.get(f"/image/assets/{digest}", headers={"If-None-Match": f'"{digest}"'})
+    assert resp.status_code == 304
+
+    resp = await async_client.get(f"/image/assets/{digest}", headers={"Range": "bytes=8-15"})
+    assert resp.status_code == 206
+    assert resp.content == PNG[8:16]
+    assert resp.headers["content-range"] == f"bytes 8-15/{size}"
+
+    resp = await async_client.get(f"/image/assets/{'0' * 64}")
+    assert resp.status_code == 404
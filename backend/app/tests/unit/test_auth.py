@@ -1,5 +1,7 @@
 
 import pytest
+from passlib.hash import bcrypt
+from app.core import security
 
 @pytest.mark.asyncio
 async def test_register_user(async_client):
@@ -58,3 +60,16 @@ async def test_refresh_token(async_client):
 async def test_refresh_invalid_token(async_client):
     resp = await async_client.post("/auth/refresh", params={"token": "abcd1234"})
     assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_outdated_hash_is_upgraded_on_verify():
+    old_hash = bcrypt.using(rounds=4).hash("pass123")
+
+    valid, new_hash = await security.verify_and_update_password("pass123", old_hash)
+    assert valid
+    assert new_hash and new_hash != old_hash
+
+    valid, again = await security.verify_and_update_password("pass123", new_hash)
+    assert valid
+    assert again is None
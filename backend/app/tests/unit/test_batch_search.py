@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from app.routers import search
+
+
+@pytest.fixture
+def batch_search(fake_search):
+    fake_search.results["broken"] = RuntimeError("upstream exploded")
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_each_result_and_saves_successes(async_client, batch_search, login):
+    headers = await login("batch@example.com")
+
+    resp = await async_client.post(
+        "/search/batch", headers=headers, json={"queries": ["cats", "broken", "dogs"], "max_results": 3}
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in resp.text.splitlines() if line]
+    results, done = events[:-1], events[-1]
+    assert sorted(e["index"] for e in results) == [0, 1, 2]
+    by_index = {e["index"]: e for e in results}
+    assert by_index[0]["status"] == 200 and by_index[0]["results"][0]["text"] == "result for cats"
+    assert by_index[1]["status"] == 500
+
+    assert done["done"] is True
+    assert (done["succeeded"], done["failed"]) == (2, 1)
+    ids = done["saved_item_ids"]
+    assert ids[1] is None and ids[0] and ids[2]
+
+    history = await async_client.get("/search/history", headers=headers)
+    assert sorted(h["query"] for h in history.json()["search_history"]) == ["cats", "dogs"]
+
+
+@pytest.mark.asyncio
+async def test_batch_sse_and_limits(async_client, batch_search, login, monkeypatch):
+    headers = await login("batch-sse@example.com")
+
+    resp = await async_client.post("/search/batch?format=sse", headers=headers, json={"queries": ["owls"]})
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text.startswith("event: result\ndata: ")
+    assert "event: done\n" in resp.text
+
+    monkeypatch.setattr(search.settings, "SEARCH_BATCH_MAX_QUERIES", 2)
+    too_many = await async_client.post("/search/batch", headers=headers, json={"queries": ["a", "b", "c"]})
+    assert too_many.status_code == 422
+    blank = await async_client.post("/search/batch", headers=headers, json={"queries": ["a", "  "]})
+    assert blank.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_stream_ends_even_when_the_batch_crashes(async_client, batch_search, login, monkeypatch):
+    async def take_token(budget, user_id):
+        raise ConnectionError("rate limiter unavailable")
+
+    monkeypatch.setattr(search, "take_token", take_token)
+    headers = await login("batch-crash@example.com")
+
+    resp = await async_client.post("/search/batch", headers=headers, json={"queries": ["cats", "dogs"]})
+    [done] = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert done["done"] is True
+    assert (done["succeeded"], done["failed"]) == (0, 2)
+    assert done["error"] == "Batch search failed"
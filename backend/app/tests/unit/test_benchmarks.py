@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+from benchmarks.fake_mcp_server import FakeUpstream, build_server
+from benchmarks.load_test import Stats, parse_mix
+
+
+@pytest.mark.asyncio
+async def test_fake_server_speaks_the_tools_the_api_calls():
+    server = build_server(FakeUpstream(latency_ms=0, jitter_ms=0, payload_bytes=2000, error_rate=0), "127.0.0.1", 0)
+    assert {t.name for t in await server.list_tools()} == {"search", "generateImage", "generateImageUrl"}
+
+    [content] = await server.call_tool("search", {"query": "load test", "max_results": 5})
+    assert content.text.startswith("Found 5 search results:")
+    assert 2000 <= len(content.text) <= 3000  # roughly payload_bytes
+
+    # the API reads imageUrl out of the first text block; same prompt, same image
+    [first] = await server.call_tool("generateImageUrl", {"prompt": "dog photo"})
+    [again] = await server.call_tool("generateImageUrl", {"prompt": "dog photo"})
+    assert json.loads(first.text)["imageUrl"] == json.loads(again.text)["imageUrl"]
+
+
+@pytest.mark.asyncio
+async def test_fake_server_injects_errors():
+    server = build_server(FakeUpstream(latency_ms=0, jitter_ms=0, payload_bytes=100, error_rate=1), "127.0.0.1", 0)
+    with pytest.raises(ToolError, match="fake upstream error"):
+        await server.call_tool("search", {"query": "boom"})
+
+
+def test_load_test_mix_and_stats(capsys):
+    assert parse_mix("search=6, image=1,auth") == {"search": 6.0, "image": 1.0, "auth": 1.0}
+
+    stats = Stats()
+    for ms in range(1, 101):
+        stats.record("search", ms / 1000, ok=ms != 100)
+    stats.record("image", 0.5, ok=True)
+    stats.report(elapsed=2.0)
+
+    out = capsys.readouterr().out
+    assert "101 requests in 2.0s" in out
+    search_row = next(line for line in out.splitlines() if line.startswith("search"))
+    name, count, errors, rate, p50, p95, p99 = search_row.split()
+    assert (count, errors, rate) == ("100", "1", "50.0")
+    assert 50 <= float(p50) < float(p95) < float(p99) <= 100
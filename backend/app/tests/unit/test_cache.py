@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from app.core.cache import AsyncTTLCache
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_lru_eviction():
+    cache = AsyncTTLCache(maxsize=2, ttl=60)
+    calls = []
+
+    async def loader(v):
+        calls.append(v)
+        return v * 10
+
+    assert await cache.get_or_load("a", lambda: loader(1)) == 10
+    assert await cache.get_or_load("a", lambda: loader(1)) == 10
+    await cache.get_or_load("b", lambda: loader(2))
+    await cache.get_or_load("c", lambda: loader(3))  # evicts "a"
+
+    assert calls == [1, 2, 3]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*[cache.get_or_load("q", loader) for _ in range(5)])
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_refreshing():
+    cache = AsyncTTLCache(maxsize=10, ttl=0.05, stale_ttl=60)
+    values = iter(["old", "new"])
+
+    async def loader():
+        return next(values)
+
+    assert await cache.get_or_load("q", loader) == "old"
+    await asyncio.sleep(0.06)
+
+    # expired but within the stale window: old value now, refresh in background
+    assert await cache.get_or_load("q", loader) == "old"
+    await asyncio.sleep(0.001)
+    assert await cache.get_or_load("q", loader) == "new"
+    assert cache.stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_loader_errors_are_not_cached():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("q", failing)
+
+    async def ok():
+        return 1
+
+    assert await cache.get_or_load("q", ok) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_fail_coalesced_waiters():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    leader = asyncio.ensure_future(cache.get_or_load("q", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(cache.get_or_load("q", loader))
+    await asyncio.sleep(0.01)
+    leader.cancel()  # e.g. the first client disconnected
+
+    assert await follower == "result"
+    assert leader.cancelled()
+    assert calls == 1
+    assert await cache.get_or_load("q", loader) == "result"  # stored for later callers
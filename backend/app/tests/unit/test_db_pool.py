@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import get_settings
+from app.core.security import create_access_token
+from app.db.session import engine_options, pool_stats
+
+
+@pytest.mark.asyncio
+async def test_engine_follows_settings_and_counts_pool_timeouts(database_url):
+    settings = get_settings().model_copy(update={
+        "DB_POOL_SIZE": 1,
+        "DB_MAX_OVERFLOW": 0,
+        "DB_POOL_TIMEOUT_SECONDS": 0.1,
+        "DB_STATEMENT_TIMEOUT_MS": 1500,
+    })
+    engine = create_async_engine(database_url, **engine_options(settings))
+    checkouts, timeouts = pool_stats.checkouts, pool_stats.timeouts
+    try:
+        async with engine.connect() as conn:
+            assert await conn.scalar(text("SHOW statement_timeout")) == "1500ms"
+            assert await conn.scalar(text("SHOW application_name")) == "ai-explorer"
+            # the only connection is taken: the next checkout waits pool_timeout, then fails
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+    finally:
+        await engine.dispose()
+
+    assert pool_stats.checkouts - checkouts == 2
+    assert pool_stats.timeouts - timeouts == 1
+    assert pool_stats.wait_seconds_max >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_pool_status_is_admin_only(async_client, login):
+    headers = await login("pool-user@example.com")
+    assert (await async_client.get("/dashboard/admin/db/pool", headers=headers)).status_code == 403
+
+    admin = {"Authorization": f"Bearer {create_access_token('0', role='admin')}"}
+    resp = await async_client.get("/dashboard/admin/db/pool", headers=admin)
+    assert resp.status_code == 200
+    status = resp.json()
+    assert status["size"] == get_settings().DB_POOL_SIZE
+    assert {"checked_out", "overflow", "checkouts", "timeouts", "wait_seconds_avg"} <= set(status)
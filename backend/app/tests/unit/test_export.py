@@ -0,0 +1,75 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.core.result_store import store_results
+from app.core.security import create_access_token
+from app.models.saved_item import SavedItem
+from app.models.search import SearchHistory
+from app.models.user import User
+
+ADMIN = {"Authorization": f"Bearer {create_access_token('0', role='admin')}"}
+
+
+async def seed_user(login, session_factory, email):
+    headers = await login(email)
+    async with session_factory() as db:
+        user_id = await db.scalar(select(User.id).where(User.email == email))
+    return headers, user_id
+
+
+@pytest.mark.asyncio
+async def test_export_formats_and_owner_filter(async_client, login, session_factory):
+    _, user_id = await seed_user(login, session_factory, "export@example.com")
+    async with session_factory() as db:
+        db.add_all([SavedItem(owner_id=user_id, item_type="note", title=f"note {i}", content="x,y") for i in range(3)])
+        await db.commit()
+
+    params = {"user_id": user_id}
+    resp = await async_client.get("/dashboard/admin/export/saved_items", headers=ADMIN, params=params)
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["title"] for r in rows] == ["note 0", "note 1", "note 2"]
+    assert {r["owner_id"] for r in rows} == {user_id}
+    assert "search_vector" not in rows[0]
+
+    resp = await async_client.get(
+        "/dashboard/admin/export/saved_items", headers=ADMIN, params={**params, "format": "csv"}
+    )
+    assert resp.headers["content-type"].startswith("text/csv")
+    header, *body = list(csv.reader(io.StringIO(resp.text)))
+    assert header == ["id", "owner_id", "item_type", "title", "content", "name", "created_at"]
+    assert [dict(zip(header, r))["content"] for r in body] == ["x,y"] * 3
+
+    packed = await async_client.get(
+        "/dashboard/admin/export/saved_items", headers=ADMIN, params={**params, "format": "csv", "gzip": "true"}
+    )
+    assert packed.headers["content-disposition"] == 'attachment; filename="saved_items.csv.gz"'
+    assert gzip.decompress(packed.content).decode() == resp.text
+
+
+@pytest.mark.asyncio
+async def test_search_history_export_carries_results(async_client, login, session_factory):
+    _, user_id = await seed_user(login, session_factory, "export-search@example.com")
+    async with session_factory() as db:
+        [result_hash] = await store_results(db, [[{"type": "text", "text": "exported"}]])
+        db.add(SearchHistory(query="export me", result_hash=result_hash, user_id=user_id))
+        await db.commit()
+
+    resp = await async_client.get("/dashboard/admin/export/search_history", headers=ADMIN, params={"user_id": user_id})
+    [row] = [json.loads(line) for line in resp.text.splitlines()]
+    assert row["query"] == "export me"
+    assert "search_vector" not in row
+    assert row["results"] == [{"type": "text", "text": "exported"}]
+
+
+@pytest.mark.asyncio
+async def test_export_is_admin_only(async_client, login):
+    headers = await login("export-user@example.com")
+    assert (await async_client.get("/dashboard/admin/export/saved_items", headers=headers)).status_code == 403
+    assert (await async_client.get("/dashboard/admin/export/users", headers=ADMIN)).status_code == 404
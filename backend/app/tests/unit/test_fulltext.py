@@ -0,0 +1,68 @@
+import pytest
+from app.core.result_store import store_results
+from app.core.security import decode_token
+from app.models.image import ImageHistory
+from app.models.saved_item import SavedItem
+from app.models.search import SearchHistory
+
+
+def user_id_of(headers):
+    return int(decode_token(headers["Authorization"].removeprefix("Bearer "))["sub"])
+
+
+@pytest.mark.asyncio
+async def test_fulltext_search_ranks_and_highlights(async_client, session_factory, login):
+    headers = await login("fts@example.com")
+    other_headers = await login("fts-other@example.com")
+    user_id, other_id = user_id_of(headers), user_id_of(other_headers)
+
+    async with session_factory() as db:
+        autoscaling, gardening, empty = await store_results(db, [
+            [{"type": "text", "text": "Horizontal pod autoscaler scales deployments"}],
+            [{"type": "text", "text": "Kubernetes? No, tomatoes."}],
+            [],
+        ])
+        db.add_all([
+            SearchHistory(query="kubernetes autoscaling", result_hash=autoscaling, user_id=user_id),
+            SearchHistory(query="gardening tips", result_hash=gardening, user_id=user_id),
+            ImageHistory(prompt="a kubernetes logo made of clouds", status="done", user_id=user_id),
+            SavedItem(owner_id=user_id, item_type="search", title="Search: kubernetes autoscaling", content="pods"),
+            SearchHistory(query="kubernetes secrets", result_hash=empty, user_id=other_id),
+        ])
+        await db.commit()
+
+    resp = await async_client.get("/search/fulltext", headers=headers, params={"q": "kubernetes"})
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert {r["type"] for r in results} == {"search", "image", "saved"}
+    assert all("secrets" not in (r["title"] or "") for r in results)  # other users' rows stay private
+    # a match in the query outranks one only in the result snippets
+    search_titles = [r["title"] for r in results if r["type"] == "search"]
+    assert search_titles[0] == "<mark>kubernetes</mark> autoscaling"
+
+    resp = await async_client.get("/search/fulltext", headers=headers, params={"q": "autoscaler", "types": "search"})
+    [hit] = resp.json()["results"]
+    assert "<mark>autoscaler</mark>" in hit["snippet"]
+
+    resp = await async_client.get("/search/fulltext", headers=other_headers, params={"q": "autoscaling"})
+    assert resp.json()["results"] == []
+
+
+@pytest.mark.asyncio
+async def test_fulltext_search_pagination(async_client, session_factory, login):
+    headers = await login("fts-pages@example.com")
+    user_id = user_id_of(headers)
+    async with session_factory() as db:
+        db.add_all([ImageHistory(prompt=f"sunset number {i}", status="done", user_id=user_id) for i in range(5)])
+        await db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "sunset", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = (await async_client.get("/search/fulltext", headers=headers, params=params)).json()
+        seen += [r["id"] for r in body["results"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 5
@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_search_history_summary_and_detail(async_client, fake_search, login):
+    headers = await login("summary@example.com")
+    await async_client.get("/search/", headers=headers, params={"query": "light rows"})
+
+    resp = await async_client.get("/search/history", headers=headers, params={"view": "summary"})
+    assert resp.status_code == 200, resp.text
+    [entry] = resp.json()["search_history"]
+    assert set(entry) == {"id", "query", "timestamp"}
+
+    detail = await async_client.get(f"/search/history/{entry['id']}", headers=headers)
+    assert detail.status_code == 200
+    assert detail.json()["results"] == [{"type": "text", "text": "result for light rows"}]
+
+    other = await login("summary-other@example.com")
+    assert (await async_client.get(f"/search/history/{entry['id']}", headers=other)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_image_history_summary_and_detail(async_client, fake_image, login):
+    headers = await login("image-summary@example.com")
+    created = await async_client.post("/image/", headers=headers, params={"prompt": "tiny boat", "fresh": "true"})
+    assert created.status_code == 200, created.text
+
+    resp = await async_client.get("/image/history", headers=headers, params={"view": "summary"})
+    [entry] = resp.json()["image_history"]
+    assert entry["prompt"] == "tiny boat" and entry["status"] == "done"
+    assert "results" not in entry and "meta" not in entry
+
+    detail = await async_client.get(f"/image/history/{entry['id']}", headers=headers)
+    assert detail.status_code == 200
+    assert detail.json()["results"] == [{"type": "text", "text": "{}"}]
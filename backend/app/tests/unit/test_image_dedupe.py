@@ -0,0 +1,67 @@
+import pytest
+from app.core.config import get_settings
+from app.routers import image
+
+
+@pytest.fixture
+def fake_upstream(fake_image, monkeypatch):
+    monkeypatch.setattr(get_settings(), "IMAGE_DEDUPE_ENABLED", True)
+    image.image_dedupe.invalidate()
+    return fake_image
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_reuses_previous_image(async_client, fake_upstream, login):
+    headers = await login("dedupe@example.com")
+
+    first = await async_client.post("/image/", headers=headers, params={"prompt": "Red  Fox"})
+    assert first.status_code == 200, first.text
+    second = await async_client.post("/image/", headers=headers, params={"prompt": "red fox"})
+    assert second.status_code == 200, second.text
+
+    assert fake_upstream == ["Red  Fox"]
+    assert second.json()["image_url"] == first.json()["image_url"]
+    assert second.json()["dedupe_of"] == first.json()["job_id"]
+    assert image.image_dedupe.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fresh_bypasses_dedupe(async_client, fake_upstream, login):
+    headers = await login("fresh@example.com")
+
+    first = await async_client.post("/image/", headers=headers, params={"prompt": "blue whale"})
+    fresh = await async_client.post("/image/", headers=headers, params={"prompt": "blue whale", "fresh": "true"})
+    again = await async_client.post("/image/", headers=headers, params={"prompt": "blue whale"})
+
+    assert len(fake_upstream) == 2
+    assert fresh.json()["image_url"] != first.json()["image_url"]
+    # the fresh result replaces the cached one
+    assert again.json()["image_url"] == fresh.json()["image_url"]
+
+
+@pytest.mark.asyncio
+async def test_reuse_stays_within_one_user(async_client, fake_upstream, login):
+    alice = await login("dedupe-alice@example.com")
+    bob = await login("dedupe-bob@example.com")
+
+    first = await async_client.post("/image/", headers=alice, params={"prompt": "green owl"})
+    other = await async_client.post("/image/", headers=bob, params={"prompt": "green owl"})
+
+    assert fake_upstream == ["green owl", "green owl"]
+    assert other.json()["dedupe_of"] is None
+    assert other.json()["image_url"] != first.json()["image_url"]
+
+
+@pytest.mark.asyncio
+async def test_reuse_is_found_in_history_without_the_memory_cache(async_client, fake_upstream, login):
+    headers = await login("dedupe-history@example.com")
+    first = await async_client.post("/image/", headers=headers, params={"prompt": "Quiet\tLake"})
+
+    image.image_dedupe.invalidate()  # another worker, or a restart
+    history_hits = image.dedupe_stats()["history_hits"]
+    again = await async_client.post("/image/", headers=headers, params={"prompt": " quiet lake "})
+
+    assert fake_upstream == ["Quiet\tLake"]
+    assert again.json()["dedupe_of"] == first.json()["job_id"]
+    assert again.json()["image_url"] == first.json()["image_url"]
+    assert image.dedupe_stats()["history_hits"] == history_hits + 1
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.core.jobs import JobQueueFullError, JobRunner
+from app.models.image import ImageHistory
+from app.models.user import User
+from app.routers import image
+
+
+async def wait_for_status(async_client, headers, job_id, status="done"):
+    for _ in range(100):
+        job = (await async_client.get(f"/image/jobs/{job_id}", headers=headers)).json()
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck at {job['status']}")
+
+
+@pytest.mark.asyncio
+async def test_subscribing_before_the_runner_starts_still_gets_events():
+    async def handler(job_id):
+        runner.publish(job_id, {"status": "done"})
+
+    runner = JobRunner(handler, workers=1, queue_size=1)
+    events = runner.subscribe(1)
+    runner.submit(1)  # starts the runner lazily
+    assert (await runner.wait(1, events, timeout=1))["status"] == "done"
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_submitted_job_can_be_polled_until_done(async_client, fake_image, login):
+    headers = await login("jobs-poll@example.com")
+    resp = await async_client.post("/image/jobs", headers=headers, params={"prompt": "paper plane"})
+    assert resp.status_code == 202, resp.text
+    job_id = resp.json()["job_id"]
+
+    job = await wait_for_status(async_client, headers, job_id)
+    assert job["image_url"] == "https://images.example.com/1.png"
+    assert fake_image == ["paper plane"]
+
+    other = await login("jobs-other@example.com")
+    assert (await async_client.get(f"/image/jobs/{job_id}", headers=other)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_events_stream_ends_with_terminal_status(async_client, fake_image, login):
+    headers = await login("jobs-sse@example.com")
+    job_id = (await async_client.post("/image/jobs", headers=headers, params={"prompt": "kite"})).json()["job_id"]
+
+    resp = await async_client.get(f"/image/jobs/{job_id}/events", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert events[-1]["status"] == "done"
+    assert events[-1]["job_id"] == job_id
+
+
+@pytest.mark.asyncio
+async def test_full_queue_answers_503_and_fails_the_job(async_client, fake_image, login, monkeypatch):
+    def submit(job_id):
+        raise JobQueueFullError("Job queue is full, try again later")
+
+    monkeypatch.setattr(image.image_jobs, "submit", submit)
+    headers = await login("jobs-full@example.com")
+    resp = await async_client.post("/image/jobs", headers=headers, params={"prompt": "crowded"})
+    assert resp.status_code == 503
+    assert "Retry-After" in resp.headers
+
+    monkeypatch.undo()
+    [entry] = (await async_client.get("/image/history", headers=headers)).json()["image_history"]
+    assert entry["status"] == "failed"
+    assert fake_image == []
+
+
+@pytest.mark.asyncio
+async def test_startup_requeues_jobs_left_running(async_client, fake_image, login, session_factory):
+    headers = await login("jobs-restart@example.com")
+    async with session_factory() as db:
+        user_id = await db.scalar(select(User.id).where(User.email == "jobs-restart@example.com"))
+        # what a worker killed mid-generation leaves behind
+        job = ImageHistory(prompt="interrupted", meta={"model": "flux"}, status="running", user_id=user_id)
+        db.add(job)
+        await db.commit()
+
+    await image.start_image_jobs()
+    done = await wait_for_status(async_client, headers, job.id)
+    assert done["image_url"] is not None
+    assert fake_image == ["interrupted"]
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from mcp.shared.memory import create_client_server_memory_streams
+
+from app.core.cache import AsyncTTLCache
+from app.core.config import get_settings
+from app.routers import mcp_client, search
+from app.routers.mcp_client import MCPPool, MCPToolError
+from benchmarks.fake_mcp_server import FakeUpstream, build_server
+
+
+class FakeSession:
+    def __init__(self, read_stream, write_stream, message_handler=None):
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def initialize(self):
+        pass
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[SimpleNamespace(name="search")])
+
+    async def call_tool(self, tool, arguments):
+        self.calls.append((tool, arguments))
+        return SimpleNamespace(isError=False, content=[], tool=tool, session=id(self))
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    connects = []
+
+    @asynccontextmanager
+    async def fake_client(url):
+        connects.append(url)
+        try:
+            yield None, None, None
+        except asyncio.CancelledError:
+            pass  # the real transport's anyio task groups can swallow a cancel on the way out
+
+    monkeypatch.setattr(mcp_client, "streamablehttp_client", fake_client)
+    monkeypatch.setattr(mcp_client, "ClientSession", FakeSession)
+    return connects
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_long_lived_session(transport):
+    pool = MCPPool()
+    pool.register("search", "http://mcp.test/mcp", size=1, timeout=5)
+    await pool.start()
+
+    first = await pool.call_tool("search", "search", {"query": "a"})
+    second = await pool.call_tool("search", "search", {"query": "b"})
+    assert first.session == second.session
+    assert transport == ["http://mcp.test/mcp"]
+
+    # a borrower reporting a broken stream gets the session rebuilt
+    conn = pool.connections("search")[0]
+    conn.mark_broken(conn.session)
+    third = await pool.call_tool("search", "search", {"query": "c"})
+    assert third.session != first.session
+    assert len(transport) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_task_stops_when_all_tasks_are_cancelled(transport):
+    pool = MCPPool()
+    pool.register("search", "http://mcp.test/mcp", size=1, timeout=5)
+    await pool.call_tool("search", "search", {"query": "a"})
+
+    # what asyncio.run / the test runner do at shutdown: cancel everything at once
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    _, pending = await asyncio.wait(tasks, timeout=2)
+    assert not pending
+    assert len(transport) == 1  # no reconnect after the cancel
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """benchmarks/fake_mcp_server.py served over in-memory streams instead of HTTP."""
+    upstream = FakeUpstream(latency_ms=0, jitter_ms=0, payload_bytes=500, error_rate=0)
+    server = build_server(upstream, "127.0.0.1", 0)._mcp_server
+
+    @asynccontextmanager
+    async def memory_client(url):
+        async with create_client_server_memory_streams() as (client_streams, server_streams):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(lambda: server.run(*server_streams, server.create_initialization_options()))
+                try:
+                    yield (*client_streams, None)
+                finally:
+                    tg.cancel_scope.cancel()
+
+    monkeypatch.setattr(mcp_client, "streamablehttp_client", memory_client)
+    monkeypatch.setattr(get_settings(), "MCP_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(get_settings(), "MCP_BREAKER_FAILURE_THRESHOLD", 100)
+    return upstream
+
+
+@pytest.mark.asyncio
+async def test_tool_errors_are_raised_not_cached_or_stored(fake_server, monkeypatch, async_client, login):
+    pool = MCPPool()
+    pool.register("search", "http://mcp.test/mcp", size=1, timeout=5)
+    cache = AsyncTTLCache(maxsize=10, ttl=60, stale_ttl=60)
+    monkeypatch.setattr(search, "mcp_pool", pool)
+    monkeypatch.setattr(search, "search_cache", cache)
+    fake_server.error_rate = 1.0
+    try:
+        # the server answers with isError=True and the error text as content
+        with pytest.raises(MCPToolError, match="fake upstream error"):
+            await search.cached_search("hello", 5)
+        assert (cache.stats()["size"], cache.stats()["load_errors"]) == (0, 1)
+        assert pool.breakers["search"].stats()["consecutive_failures"] == get_settings().MCP_RETRY_ATTEMPTS + 1
+
+        headers = await login("tool-error@example.com")
+        resp = await async_client.get("/search/", headers=headers, params={"query": "hello"})
+        assert resp.status_code == 502
+        history = await async_client.get("/search/history", headers=headers)
+        assert history.json()["search_history"] == []
+
+        fake_server.error_rate = 0.0
+        [result] = await search.cached_search("hello", 5)
+        assert result["text"].startswith("Found 5 search results")
+        assert pool.breakers["search"].stats()["consecutive_failures"] == 0
+    finally:
+        await pool.close()
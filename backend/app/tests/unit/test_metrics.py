@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.metrics import _request_db, instrument_engine
+from app.core.write_behind import WriteBehindQueue
+
+
+@pytest.mark.asyncio
+async def test_background_work_is_not_charged_to_the_request_that_started_it(database_url):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    instrument_engine(engine.sync_engine)
+
+    async def select_one():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def flush(records):
+        await select_one()
+        return records
+
+    queue = WriteBehindQueue("metrics", flush, batch_size=1, interval=60)
+    acc = {"count": 0, "seconds": 0.0}
+    token = _request_db.set(acc)  # what metrics_middleware does for each request
+    try:
+        # the first submit starts the flusher from inside the request
+        assert await queue.submit("a") == "a"
+        await select_one()
+    finally:
+        _request_db.reset(token)
+        await queue.close()
+        WriteBehindQueue.instances.remove(queue)
+        await engine.dispose()
+
+    assert acc["count"] == 1
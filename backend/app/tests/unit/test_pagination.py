@@ -0,0 +1,30 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app.core.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    ts = datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    cursor = encode_cursor(ts, 42)
+    assert decode_cursor(cursor) == (ts, 42)
+
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_history_pagination(async_client):
+    await async_client.post("/auth/register", json={"email": "pageuser@example.com", "password": "pass123"})
+    resp = await async_client.post("/auth/login", json={"email": "pageuser@example.com", "password": "pass123"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    resp = await async_client.get("/search/history", headers=headers, params={"limit": 1})
+    assert resp.status_code == 200
+    assert "next_cursor" in resp.json()
+
+    resp = await async_client.get("/search/history", headers=headers, params={"cursor": "garbage"})
+    assert resp.status_code == 400
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.core.ratelimit import AdmissionController, MemoryBucketBackend, OverloadedError
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_rejects():
+    backend = MemoryBucketBackend()
+
+    results = [await backend.take("search:1", rate=1.0, burst=3) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 0 < results[-1][1] <= 1.0
+    # other users have their own bucket
+    assert (await backend.take("search:2", rate=1.0, burst=3))[0]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills():
+    backend = MemoryBucketBackend()
+    assert (await backend.take("k", rate=50.0, burst=1))[0]
+    assert not (await backend.take("k", rate=50.0, burst=1))[0]
+
+    await asyncio.sleep(0.05)
+    assert (await backend.take("k", rate=50.0, burst=1))[0]
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_wait_queue_is_full():
+    admission = AdmissionController(limit=1, max_waiting=1, wait_timeout=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with admission.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError):
+        async with admission.slot():
+            pass
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert admission.stats() == {"limit": 1, "active": 0, "waiting": 0, "rejected": 1}
+
+
+@pytest.mark.asyncio
+async def test_admission_times_out_waiting_for_a_slot():
+    admission = AdmissionController(limit=1, max_waiting=10, wait_timeout=0.02)
+
+    async with admission.slot():
+        with pytest.raises(OverloadedError):
+            async with admission.slot():
+                pass
@@ -0,0 +1,56 @@
+import time
+import pytest
+from app.core.resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+def fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        probe = breaker.before_call()
+        breaker.record_failure(RuntimeError("upstream down"))
+        breaker.release(probe)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("search", failure_threshold=3, reset_timeout=60)
+    fail(breaker, 2)
+    breaker.record_success()  # resets the streak
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+
+    fail(breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before_call()
+    assert 0 < exc.value.retry_after <= 60
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("image", failure_threshold=1, reset_timeout=0.01)
+    fail(breaker)
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+
+    probe = breaker.before_call()
+    assert probe is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # a second caller is rejected while the probe runs
+
+    breaker.record_success()
+    breaker.release(probe)
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("image", failure_threshold=1, reset_timeout=0.01)
+    fail(breaker)
+    time.sleep(0.02)
+    fail(breaker)
+
+    assert breaker.state == "open"
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, 0.2, 1.0) <= 1.0 for attempt in range(10))
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import literal, select, text
+
+from app.core.responses import RawJSON, RawJSONResponse, json_row, jsonb_head
+
+
+def test_raw_json_fragments_are_spliced_without_reencoding():
+    body = RawJSONResponse({
+        "rows": [RawJSON('{"id": 1, "results": [{"text": "a"}]}')],
+        "at": datetime(2025, 8, 24, tzinfo=timezone.utc),
+        "next_cursor": None,
+    }).body
+    assert json.loads(body) == {
+        "rows": [{"id": 1, "results": [{"text": "a"}]}],
+        "at": "2025-08-24T00:00:00+00:00",
+        "next_cursor": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_rows_are_encoded_by_postgres(db_session):
+    results = text("'[{\"n\": 1}, {\"n\": 2}, {\"n\": 3}]'::jsonb")
+    row = await db_session.scalar(
+        select(json_row(id=literal(7), results=results, head=jsonb_head(results, 2), none=jsonb_head(results, 0)))
+    )
+    assert isinstance(row, str)
+    assert json.loads(row) == {
+        "id": 7,
+        "results": [{"n": 1}, {"n": 2}, {"n": 3}],
+        "head": [{"n": 1}, {"n": 2}],
+        "none": [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_history_snippets_are_cut_in_the_database(async_client, fake_search, login):
+    fake_search.results["jsonb"] = [{"type": "text", "text": f"jsonb {i}"} for i in range(3)]
+    headers = await login("snippets@example.com")
+    await async_client.get("/search/", headers=headers, params={"query": "jsonb", "wait_for_persist": "true"})
+
+    resp = await async_client.get("/search/history", headers=headers, params={"snippets": 1})
+    assert resp.status_code == 200, resp.text
+    [entry] = resp.json()["search_history"]
+    assert entry["results"] == [{"type": "text", "text": "jsonb 0"}]
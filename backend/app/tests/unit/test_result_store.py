@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import select
+
+from app.core.result_store import store_results
+from app.models.search import SearchHistory, SearchResult
+from app.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_identical_payloads_share_one_blob_until_last_reference_goes(session_factory):
+    payload = [{"type": "text", "text": "same answer for everyone", "score": 1}]
+    # same document, different key order: jsonb normalizes it to the same text
+    reordered = [{"score": 1, "text": "same answer for everyone", "type": "text"}]
+
+    async with session_factory() as db:
+        user = User(email="blobs@example.com", hashed_password="x", role="user")
+        db.add(user)
+        await db.flush()
+        hashes = await store_results(db, [payload, reordered, payload])
+        assert len(set(hashes)) == 1
+        rows = [SearchHistory(query=f"q{i}", result_hash=h, user_id=user.id) for i, h in enumerate(hashes)]
+        db.add_all(rows)
+        await db.commit()
+
+        blob = await db.get(SearchResult, hashes[0])
+        assert blob.ref_count == 3 and blob.payload == payload
+
+        await db.delete(rows[0])
+        await db.delete(rows[1])
+        await db.commit()
+        db.expire_all()
+        assert (await db.get(SearchResult, hashes[0])).ref_count == 1
+
+        await db.delete(rows[2])
+        await db.commit()
+        db.expire_all()
+        assert (await db.scalar(select(SearchResult).where(SearchResult.hash == hashes[0]))) is None
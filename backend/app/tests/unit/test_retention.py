@@ -0,0 +1,81 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from app.core.config import get_settings
+from app.core.result_store import store_results
+from app.core.retention import compactor, ensure_partition, table_sizes
+from app.models.search import SearchHistory, SearchResult
+from app.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_expired_partition_is_archived_and_dropped(session_factory, monkeypatch, tmp_path):
+    monkeypatch.setattr(get_settings(), "SEARCH_HISTORY_RETENTION_DAYS", 30)
+    monkeypatch.setattr(get_settings(), "RETENTION_ARCHIVE_DIR", str(tmp_path))
+    old_month = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    async with session_factory() as db:
+        assert await ensure_partition(db, "search_history", old_month)
+        user = User(email="retention@example.com", hashed_password="x", role="user")
+        db.add(user)
+        await db.flush()
+        kept, dropped = [{"text": "archived in a partition"}], [{"text": "left in default"}]
+        hashes = await store_results(db, [kept, dropped, kept])
+        db.add_all([
+            # lands in search_history_p202001
+            SearchHistory(query="old", result_hash=hashes[0], user_id=user.id,
+                          timestamp=datetime(2020, 1, 15, tzinfo=timezone.utc)),
+            # no partition for that month: lands in search_history_default
+            SearchHistory(query="older", result_hash=hashes[1], user_id=user.id,
+                          timestamp=datetime(2019, 6, 1, tzinfo=timezone.utc)),
+            SearchHistory(query="recent", result_hash=hashes[2], user_id=user.id),
+        ])
+        await db.commit()
+
+    result = await compactor.run_once()
+    summary = result["search_history"]
+    assert "search_history_p202001" in summary["dropped"]
+    assert summary["deleted_rows"] >= 1
+
+    archive = tmp_path / "search_history" / "search_history_p202001.ndjson.gz"
+    with gzip.open(archive, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [r["query"] for r in rows] == ["old"]
+    assert rows[0]["results"] == [{"text": "archived in a partition"}]
+    defaults = list((tmp_path / "search_history").glob("search_history_default-*.ndjson.gz"))
+    with gzip.open(defaults[0], "rt", encoding="utf-8") as f:
+        assert "older" in [json.loads(line)["query"] for line in f]
+
+    async with session_factory() as db:
+        assert await db.scalar(text("SELECT to_regclass('search_history_p202001')")) is None
+        queries = (await db.scalars(select(SearchHistory.query).where(SearchHistory.user_id == user.id))).all()
+        assert queries == ["recent"]
+        # the dropped row's reference is released, the recent row still holds the blob
+        assert (await db.get(SearchResult, hashes[0])).ref_count == 1
+        assert await db.get(SearchResult, hashes[1]) is None
+
+        sizes = await table_sizes(db)
+        assert sizes["search_history"]["retention_days"] == 30
+        assert "search_history_default" in [p["name"] for p in sizes["search_history"]["partitions"]]
+
+
+@pytest.mark.asyncio
+async def test_partition_ddl_gives_up_while_the_parent_is_locked(session_factory, monkeypatch):
+    monkeypatch.setattr(get_settings(), "PARTITION_DDL_LOCK_TIMEOUT_MS", 100)
+    month = datetime(2020, 3, 1, tzinfo=timezone.utc)
+
+    async with session_factory() as reader, session_factory() as db:
+        # a long-running reader: harmless to other queries, but blocks the DDL
+        await reader.execute(text("LOCK TABLE search_history IN ACCESS SHARE MODE"))
+        assert not await ensure_partition(db, "search_history", month)
+        # the session is still usable after the timeout
+        assert await db.scalar(text("SELECT to_regclass('search_history_p202003')")) is None
+        await reader.rollback()
+
+        assert await ensure_partition(db, "search_history", month)
+        await db.execute(text("DROP TABLE search_history_p202003"))
+        await db.commit()
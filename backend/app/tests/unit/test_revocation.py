@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import security
+from app.core.revocation import revocations
+from app.models.revoked_token import RevokedToken
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_and_refresh_tokens(async_client, auth_tokens):
+    tokens = await auth_tokens("logout@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert (await async_client.get("/search/history", headers=headers)).status_code == 200
+
+    resp = await async_client.post("/auth/logout", headers=headers, json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 204
+
+    assert (await async_client.get("/search/history", headers=headers)).status_code == 401
+    resp = await async_client.post("/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotation_rejects_reuse(async_client, auth_tokens):
+    tokens = await auth_tokens("rotate@example.com")
+
+    first = await async_client.post("/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert first.status_code == 200
+    reused = await async_client.post("/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert reused.status_code == 401
+
+    rotated = await async_client.post("/auth/refresh", params={"token": first.json()["refresh_token"]})
+    assert rotated.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_mirror_picks_up_revocations_from_other_workers(session_factory):
+    claims = security.decode_token(security.create_access_token("7"))
+    # another worker's revocation: only the database knows about it
+    other = type(revocations)(refresh_interval=0)
+    other.session_maker = session_factory
+    assert await other.revoke(claims)
+
+    await revocations.refresh()
+    assert revocations.is_revoked(claims["jti"])
+    assert not await other.revoke(claims)  # already revoked
+
+
+@pytest.mark.asyncio
+async def test_mirror_sees_revocations_that_commit_out_of_id_order(session_factory):
+    mirror = type(revocations)(refresh_interval=0)
+    mirror.session_maker = session_factory
+    await mirror.refresh()
+
+    def row(jti):
+        return RevokedToken(jti=jti, user_id=7, token_type="access", expires_at=datetime.now(timezone.utc) + timedelta(hours=1))
+
+    async with session_factory() as slow, session_factory() as fast:
+        slow.add(row("slow-commit"))
+        await slow.flush()  # takes the lower id, but stays uncommitted
+        fast.add(row("fast-commit"))
+        await fast.commit()
+
+        await mirror.refresh()  # sees the higher id only
+        assert mirror.is_revoked("fast-commit") and not mirror.is_revoked("slow-commit")
+        await slow.commit()
+
+    await mirror.refresh()
+    assert mirror.is_revoked("slow-commit")
+
+
+@pytest.mark.asyncio
+async def test_unreachable_database_is_not_reported_as_a_bad_token(async_client, login, monkeypatch):
+    headers = await login("db-down@example.com")
+
+    def unreachable():
+        raise ConnectionRefusedError("database is down")
+
+    cold = type(revocations)(refresh_interval=0)  # a worker that hasn't loaded the mirror yet
+    cold.session_maker = unreachable
+    monkeypatch.setattr(security, "revocations", cold)
+    resp = await async_client.get("/search/history", headers=headers)
+    assert resp.status_code == 503
+
+    # once loaded, a failing refresh keeps serving the last mirror
+    monkeypatch.setattr(security, "revocations", revocations)
+    await revocations.refresh()
+    monkeypatch.setattr(revocations, "refresh_interval", 0)
+    monkeypatch.setattr(revocations, "session_maker", unreachable)
+    assert (await async_client.get("/search/history", headers=headers)).status_code == 200
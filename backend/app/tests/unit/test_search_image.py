@@ -39,7 +39,7 @@ async def test_search_creates_saved_item_and_dashboard(async_client):
     # Admin can see it in dashboard
     resp_admin = await async_client.get("/dashboard/admin/users/all", headers=admin_headers)
     assert resp_admin.status_code == 200, resp_admin.text
-    items = resp_admin.json()
+    items = resp_admin.json()["items"]
     assert any("fastapi" in (i.get("title") or "").lower() for i in items)
 
 
@@ -75,7 +75,7 @@ async def test_image_creates_saved_item_and_dashboard(async_client):
 
     resp_admin = await async_client.get("/dashboard/admin/users/all", headers=admin_headers)
     assert resp_admin.status_code == 200, resp_admin.text
-    items = resp_admin.json()
+    items = resp_admin.json()["items"]
     assert any("dog" in (i.get("title") or "").lower() for i in items)
 
 
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from types import SimpleNamespace
+
+from app.routers.mcp_client import MCPTimeoutError
+
+
+def parse_events(text):
+    events = []
+    for block in text.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_progress_results_then_done(async_client, fake_search, login):
+    fake_search.progress = [SimpleNamespace(progress=1, total=2, message="fetching")]
+    fake_search.results["streamed"] = [{"type": "text", "text": "first"}, {"type": "text", "text": "second"}]
+    headers = await login("stream@example.com")
+
+    resp = await async_client.get("/search/stream", headers=headers, params={"query": "streamed"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(resp.text)
+    assert [name for name, _ in events] == ["status", "progress", "result", "result", "done"]
+    assert events[1][1] == {"progress": 1, "total": 2, "message": "fetching"}
+    assert [data["item"]["text"] for name, data in events if name == "result"] == ["first", "second"]
+    assert events[-1][1]["saved_item_id"]
+
+    history = await async_client.get("/search/history", headers=headers)
+    assert [h["query"] for h in history.json()["search_history"]] == ["streamed"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_upstream_failure(async_client, fake_search, login):
+    fake_search.results["slow"] = MCPTimeoutError("MCP server 'search' did not answer 'search' within 20s")
+    headers = await login("stream-fail@example.com")
+
+    resp = await async_client.get("/search/stream", headers=headers, params={"query": "slow"})
+    events = parse_events(resp.text)
+    assert [name for name, _ in events] == ["status", "error"]
+    assert events[-1][1]["status"] == 504
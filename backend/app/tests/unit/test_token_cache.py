@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import TokenCache
+
+
+def test_cached_claims_are_returned_until_exp():
+    cache = TokenCache(maxsize=10, ttl=300)
+    cache.put("tok", {"sub": "1", "exp": time.time() + 60})
+    assert cache.get("tok")["sub"] == "1"
+
+    cache.put("old", {"sub": "2", "exp": time.time() - 1})
+    assert cache.get("old") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 1, 1)
+
+
+def test_lru_eviction():
+    cache = TokenCache(maxsize=2, ttl=300)
+    cache.put("a", {"sub": "a"})
+    cache.put("b", {"sub": "b"})
+    cache.get("a")  # b is now least recently used
+    cache.put("c", {"sub": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_verifies_each_token_once(monkeypatch):
+    calls = []
+    decode = security.decode_token
+
+    def counting_decode(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(security, "decode_token", counting_decode)
+    security.token_cache.invalidate()
+    token = security.create_access_token("42", "admin")
+
+    for _ in range(3):
+        assert await security.get_current_user(token) == {"sub": "42", "role": "admin"}
+    assert calls == [token]
+
+    expired = security.create_token("42", "user", timedelta(seconds=-1), "access")
+    with pytest.raises(HTTPException):
+        await security.get_current_user(expired)
+    assert security.token_cache.get(expired) is None
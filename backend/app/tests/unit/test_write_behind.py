@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.core.write_behind import WriteBehindQueue
+
+
+@pytest.mark.asyncio
+async def test_records_are_flushed_in_batches():
+    batches = []
+
+    async def flush(records):
+        batches.append(list(records))
+        return [r * 10 for r in records]
+
+    queue = WriteBehindQueue("test", flush, batch_size=3, interval=0.01)
+    futures = [queue.submit(i) for i in range(5)]
+
+    assert await asyncio.gather(*futures) == [0, 10, 20, 30, 40]
+    assert batches[0] == [0, 1, 2]
+    assert sum(len(b) for b in batches) == 5
+    await queue.close()
+    WriteBehindQueue.instances.remove(queue)
+
+
+@pytest.mark.asyncio
+async def test_bad_record_does_not_sink_batch():
+    async def flush(records):
+        if "bad" in records:
+            raise ValueError("bad record")
+        return records
+
+    queue = WriteBehindQueue("test", flush, batch_size=10, interval=60)
+    good, bad = queue.submit("good"), queue.submit("bad")
+    await queue.barrier()
+
+    assert await good == "good"
+    with pytest.raises(ValueError):
+        await bad
+    assert queue.stats()["failed"] == 1
+    await queue.close()
+    WriteBehindQueue.instances.remove(queue)
+
+
+@pytest.mark.asyncio
+async def test_close_drains_pending_records():
+    written = []
+
+    async def flush(records):
+        written.extend(records)
+        return records
+
+    queue = WriteBehindQueue("test", flush, batch_size=100, interval=60)
+    queue.submit("a")
+    queue.submit("b")
+    await queue.close()
+
+    assert written == ["a", "b"]
+    WriteBehindQueue.instances.remove(queue)
+
+
+@pytest.mark.asyncio
+async def test_close_during_flush_keeps_the_batch():
+    written, started, release = [], asyncio.Event(), asyncio.Event()
+
+    async def flush(records):
+        started.set()
+        await release.wait()
+        written.extend(records)
+        return records
+
+    queue = WriteBehindQueue("test", flush, batch_size=1, interval=60)
+    first = queue.submit("a")
+    await started.wait()
+    second = queue.submit("b")  # arrives while "a" is being written
+
+    closing = asyncio.create_task(queue.close())
+    await asyncio.sleep(0.01)
+    assert not closing.done()
+    release.set()
+    await asyncio.wait_for(closing, 1)
+
+    assert written == ["a", "b"]
+    assert (await first, await second) == ("a", "b")
+    WriteBehindQueue.instances.remove(queue)
@@ -0,0 +1,84 @@
+"""Login hashing benchmark: bcrypt on the event loop vs. on the hash executor.
+
+Runs CONCURRENCY simulated logins at once and, alongside them, a ping task that
+stands in for every other route sharing the loop. Reports p50/p95/p99 for both.
+
+    cd backend
+    python -m benchmarks.bench_login --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core import security
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return f"p50={q[49] * 1000:8.1f}ms  p95={q[94] * 1000:8.1f}ms  p99={q[98] * 1000:8.1f}ms"
+
+
+async def login_inline(password: str, hashed: str):
+    # what /auth/login used to do
+    return security.verify_password(password, hashed)
+
+
+async def login_offloaded(password: str, hashed: str):
+    return await security.verify_and_update_password(password, hashed)
+
+
+async def run(login, logins: int, concurrency: int, hashed: str):
+    sem = asyncio.Semaphore(concurrency)
+    login_times: list[float] = []
+    ping_times: list[float] = []
+    done = asyncio.Event()
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            await login("correct horse", hashed)
+            login_times.append(time.perf_counter() - start)
+
+    async def ping():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            ping_times.append(time.perf_counter() - start - 0.005)
+
+    pinger = asyncio.create_task(ping())
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await pinger
+
+    print(f"  logins/s   {logins / elapsed:8.1f}")
+    print(f"  login      {percentiles(login_times)}")
+    print(f"  loop stall {percentiles(ping_times)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    hashed = security.hash_password("correct horse")
+    settings = security.get_settings()
+    print(
+        f"bcrypt rounds={settings.BCRYPT_ROUNDS} executor={settings.PASSWORD_HASH_EXECUTOR} "
+        f"workers={settings.PASSWORD_HASH_WORKERS} logins={args.logins} concurrency={args.concurrency}"
+    )
+
+    print("before: verify on the event loop")
+    await run(login_inline, args.logins, args.concurrency, hashed)
+    print("after: verify on the hash executor")
+    await run(login_offloaded, args.logins, args.concurrency, hashed)
+
+    security.shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
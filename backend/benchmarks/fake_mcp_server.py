@@ -0,0 +1,95 @@
+"""Local stand-in for the smithery.ai MCP servers, for load tests and offline runs.
+
+Serves `search`, `generateImage` and `generateImageUrl` over streamable HTTP with
+configurable latency, payload size and error rate:
+
+    cd backend
+    python -m benchmarks.fake_mcp_server --port 8931 --latency-ms 150 --payload-bytes 4000 --error-rate 0.01
+
+then start the API against it:
+
+    MCP_SEARCH_URL=http://127.0.0.1:8931/mcp MCP_IMAGE_URL=http://127.0.0.1:8931/mcp uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from mcp.server.fastmcp import FastMCP
+
+
+class FakeUpstream:
+    def __init__(self, latency_ms: float, jitter_ms: float, payload_bytes: int, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.payload_bytes = payload_bytes
+        self.error_rate = error_rate
+
+    async def work(self):
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            raise RuntimeError("fake upstream error")
+
+    def search_text(self, query: str, max_results: int) -> str:
+        # same shape as the DuckDuckGo server: one numbered block per result
+        per_result = max(self.payload_bytes // max(max_results, 1), 80)
+        blocks = []
+        for i in range(1, max_results + 1):
+            snippet = f"Result {i} for {query}. " * (per_result // (len(query) + 16) + 1)
+            blocks.append(
+                f"{i}. {query} - result {i}\n"
+                f"   URL: https://example.com/{i}?q={query.replace(' ', '+')}\n"
+                f"   Summary: {snippet[:per_result]}\n"
+            )
+        return f"Found {max_results} search results:\n\n" + "\n".join(blocks)
+
+    def image_payload(self, prompt: str, model: str) -> str:
+        digest = hashlib.sha256(f"{model}:{prompt}".encode()).hexdigest()[:16]
+        return json.dumps({
+            "imageUrl": f"https://picsum.photos/seed/{digest}/1024/1024",
+            "prompt": prompt,
+            "model": model,
+            "width": 1024,
+            "height": 1024,
+        })
+
+
+def build_server(upstream: FakeUpstream, host: str, port: int) -> FastMCP:
+    server = FastMCP("fake-mcp", host=host, port=port)
+
+    @server.tool()
+    async def search(query: str, max_results: int = 10) -> str:
+        await upstream.work()
+        return upstream.search_text(query, max_results)
+
+    @server.tool()
+    async def generateImageUrl(prompt: str, model: str = "flux") -> str:
+        await upstream.work()
+        return upstream.image_payload(prompt, model)
+
+    @server.tool()
+    async def generateImage(prompt: str, model: str = "flux") -> str:
+        await upstream.work()
+        return upstream.image_payload(prompt, model)
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8931)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="approximate size of search results")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.latency_ms, args.jitter_ms, args.payload_bytes, args.error_rate)
+    build_server(upstream, args.host, args.port).run(transport="streamable-http")
+
+
+if __name__ == "__main__":
+    main()
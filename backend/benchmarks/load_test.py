@@ -0,0 +1,142 @@
+"""Load generator for the API: auth, search, image and history endpoints.
+
+Registers a pool of users, then keeps CONCURRENCY virtual clients busy for
+DURATION seconds, each picking an endpoint by weight. Reports throughput,
+error counts and p50/p95/p99 per endpoint.
+
+    cd backend
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 50 --duration 60
+
+Run it against benchmarks/fake_mcp_server.py to keep upstream latency fixed.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import httpx
+
+QUERIES = [
+    "fastapi tutorial", "python async", "postgres indexes", "what is mcp",
+    "react hooks", "jwt refresh tokens", "sqlalchemy 2.0", "docker compose",
+]
+PROMPTS = ["mountain landscape", "dog photo", "cat drawing", "city at night", "abstract waves"]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def record(self, name: str, elapsed: float, ok: bool):
+        self.latencies.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float):
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"\n{total} requests in {elapsed:.1f}s -> {total / elapsed:.1f} req/s\n")
+        print(f"{'endpoint':<16}{'count':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, samples in sorted(self.latencies.items()):
+            q = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else [samples[0]] * 99
+            print(
+                f"{name:<16}{len(samples):>8}{self.errors.get(name, 0):>8}{len(samples) / elapsed:>9.1f}"
+                f"{q[49] * 1000:>10.1f}{q[94] * 1000:>10.1f}{q[98] * 1000:>10.1f}"
+            )
+
+
+async def timed(stats: Stats, name: str, request):
+    start = time.perf_counter()
+    try:
+        resp = await request
+        ok = resp.status_code < 400
+    except httpx.HTTPError:
+        resp, ok = None, False
+    stats.record(name, time.perf_counter() - start, ok)
+    return resp
+
+
+async def create_user(client: httpx.AsyncClient, stats: Stats) -> dict:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    password = "loadtest-pass"
+    resp = await timed(stats, "auth.register", client.post("/auth/register", json={"email": email, "password": password}))
+    if resp is None or resp.status_code != 200:
+        raise RuntimeError(f"register failed: {resp.text if resp is not None else 'no response'}")
+    return {"email": email, "password": password, "token": resp.json()["access_token"]}
+
+
+def build_actions(client: httpx.AsyncClient):
+    def auth(user):
+        return "auth.login", client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+
+    def search(user):
+        return "search", client.get("/search/", params={"query": random.choice(QUERIES)}, headers=headers(user))
+
+    def image(user):
+        return "image", client.post("/image/", params={"prompt": random.choice(PROMPTS)}, headers=headers(user))
+
+    def search_history(user):
+        return "search.history", client.get("/search/history", headers=headers(user))
+
+    def image_history(user):
+        return "image.history", client.get("/image/history", headers=headers(user))
+
+    return {
+        "auth": auth,
+        "search": search,
+        "image": image,
+        "search_history": search_history,
+        "image_history": image_history,
+    }
+
+
+def headers(user: dict) -> dict:
+    return {"Authorization": f"Bearer {user['token']}"}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        default="search=6,search_history=3,image=1,image_history=2,auth=1",
+        help="endpoint weights",
+    )
+    args = parser.parse_args()
+
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        users = await asyncio.gather(*[create_user(client, stats) for _ in range(args.users)])
+
+        actions = build_actions(client)
+        weights = parse_mix(args.mix)
+        names = [n for n in weights if n in actions]
+        deadline = time.perf_counter() + args.duration
+
+        async def virtual_client():
+            while time.perf_counter() < deadline:
+                name = random.choices(names, weights=[weights[n] for n in names])[0]
+                label, request = actions[name](random.choice(users))
+                await timed(stats, label, request)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[virtual_client() for _ in range(args.concurrency)])
+        stats.report(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
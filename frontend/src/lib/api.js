@@ -1,5 +1,11 @@
 const BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
+// ✅ Prefer the locally stored thumbnail over the upstream image URL
+export function imageSrc(img) {
+  if (img.thumbnail_url) return BASE + img.thumbnail_url;
+  return img.image_url || img.url;
+}
+
 function authHeaders(token) {
   return {
     "Content-Type": "application/json",
@@ -52,6 +58,15 @@ export const AuthAPI = {
     });
     return handle(res);
   },
+
+  // ✅ Revoke both tokens server-side; local logout happens regardless
+  async logout(token, refreshToken) {
+    await fetch(BASE + "/auth/logout", {
+      method: "POST",
+      headers: { ...authHeaders(token) },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    }).catch(() => {});
+  },
 };
 
 //
@@ -66,8 +81,38 @@ export const SearchAPI = {
     return handle(res);
   },
 
-  async history(token) {
-    const res = await fetch(BASE + "/search/history", {
+  // ✅ Server-Sent Events: onEvent(name, data) for status / progress / result / done / error
+  // (fetch instead of EventSource, which can't send the Authorization header)
+  async stream(q, token, onEvent) {
+    const res = await fetch(BASE + `/search/stream?query=${encodeURIComponent(q)}`, {
+      headers: { ...authHeaders(token) },
+    });
+    if (!res.ok) return handle(res);
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+      let end;
+      while ((end = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        let name = "message";
+        let data = "";
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event: ")) name = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if (data) onEvent(name, JSON.parse(data));
+      }
+    }
+  },
+
+  // ✅ view = "summary" skips the results payload (list pages don't need it)
+  async history(token, view = "full") {
+    const res = await fetch(BASE + `/search/history?view=${view}`, {
       headers: { ...authHeaders(token) },
     });
     return handle(res);
@@ -97,8 +142,8 @@ export const ImageAPI = {
     return handle(res);
   },
 
-  async history(token) {
-    const res = await fetch(BASE + "/image/history", {
+  async history(token, view = "full") {
+    const res = await fetch(BASE + `/image/history?view=${view}`, {
       headers: { ...authHeaders(token) },
     });
     return handle(res);
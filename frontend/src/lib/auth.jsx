@@ -1,4 +1,5 @@
 import React, { createContext, useContext, useEffect, useMemo, useState } from "react";
+import { AuthAPI } from "./api";
 
 const AuthContext = createContext(null);
 const storageKey = "ace_auth";
@@ -33,6 +34,7 @@ export function AuthProvider({ children }) {
       role: auth?.user?.role || "user",
       login: (payload) => setAuth(payload),
       logout: () => {
+        if (auth?.access_token) AuthAPI.logout(auth.access_token, auth.refresh_token);
         localStorage.removeItem(storageKey); // ✅ logout pe storage bhi clear
         setAuth(null);
       },
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { SearchAPI, ImageAPI } from "../lib/api";
+import { SearchAPI, ImageAPI, imageSrc } from "../lib/api";
 import { useAuth } from "../lib/auth";
 
 // ✅ String truncate helper
@@ -190,7 +190,7 @@ export default function Dashboard() {
           {imageHistory.map((img, idx) => (
             <div key={img.id || idx} className="card relative">
               <img
-                src={img.image_url || img.url}
+                src={imageSrc(img)}
                 alt="Generated"
                 className="rounded-xl"
               />
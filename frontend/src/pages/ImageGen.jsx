@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { ImageAPI } from "../lib/api";
+import { ImageAPI, imageSrc } from "../lib/api";
 import { useAuth } from "../lib/auth";
 
 export default function ImageGen() {
@@ -21,6 +21,7 @@ export default function ImageGen() {
           id: res.id || Date.now(),
           prompt: res.prompt,
           image_url: res.image_url || res.url,
+          thumbnail_url: res.thumbnail_url,
         },
         ...prev,
       ]);
@@ -35,7 +36,7 @@ export default function ImageGen() {
   useEffect(() => {
     (async () => {
       try {
-        const hist = await ImageAPI.history(token);
+        const hist = await ImageAPI.history(token, "summary");
         // ✅ API returns { image_history: [...] }
         setImages(Array.isArray(hist?.image_history) ? hist.image_history : []);
       } catch (err) {
@@ -79,7 +80,7 @@ export default function ImageGen() {
               className="card bg-gray-50 dark:bg-gray-800 p-3 rounded-lg shadow"
             >
               <img
-                src={img.image_url || img.url}
+                src={imageSrc(img)}
                 alt={img.prompt || "AI result"}
                 className="rounded-xl"
               />
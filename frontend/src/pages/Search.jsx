@@ -13,15 +13,13 @@ export default function Search() {
     if (!query.trim()) return; // empty query avoid karo
     setLoading(true);
     setError("");
+    setResults([]);
     try {
-      const res = await SearchAPI.query(query, token);
-
-      // ✅ MCP returns { results: [...] }
-      if (Array.isArray(res.results)) {
-        setResults(res.results);
-      } else {
-        setResults([]);
-      }
+      // ✅ render each result as soon as it is streamed
+      await SearchAPI.stream(query, token, (event, data) => {
+        if (event === "result") setResults((prev) => [...prev, data.item]);
+        if (event === "error") setError(data.detail || "Search failed");
+      });
     } catch (err) {
       setError(err.message || "Search failed");
     } finally {
@@ -33,7 +31,7 @@ export default function Search() {
   useEffect(() => {
     (async () => {
       try {
-        const hist = await SearchAPI.history(token);
+        const hist = await SearchAPI.history(token, "summary");
 
         // backend returns { search_history: [...] }
         if (Array.isArray(hist?.search_history)) {